@@ -0,0 +1,44 @@
+"""Throughput, in children per second, of the crossover operators using the per pair path and the batched kernels.
+
+Run from the repository root with:
+    python -m benchmarks.bench_crossover
+"""
+from genetic_algorithm.crossover import RandomCrossover, SBXCrossover
+from genetic_algorithm.individual import create_list_of_random_individuals
+from genetic_algorithm.matrix import PopulationMatrix
+import numpy as np
+import random
+import time
+
+SIZES = [(1000, 10), (1000, 100), (1000, 1000)]
+
+
+def per_pair_offspring(crossover, parents, parents_pair):
+    children = []
+    for parent_1, parent_2 in parents_pair:
+        children.extend(crossover.generate_offspring(parents[parent_1], parents[parent_2]))
+    return children
+
+
+def children_per_second(fun, *args) -> float:
+    start = time.perf_counter()
+    n_children = len(fun(*args))
+    return n_children / (time.perf_counter() - start)
+
+
+def main() -> None:
+    print(f"{'operator':>16} | {'individuals':>11} | {'genes':>6} | {'per pair':>12} | {'batched':>12} | {'matrix':>12}")
+    for n_ind, n_genes in SIZES:
+        parents = create_list_of_random_individuals(n_ind, n_genes)
+        matrix = PopulationMatrix.random(n_ind, n_genes)
+        parents_pair = [tuple(random.sample(range(n_ind), 2)) for _ in range(n_ind)]
+        pairs_array = np.array(parents_pair)
+        for crossover in [RandomCrossover(children_ratio=1.0), SBXCrossover(children_ratio=1.0)]:
+            per_pair = children_per_second(per_pair_offspring, crossover, parents, parents_pair)
+            batched = children_per_second(crossover.generate_all_offspring, parents, parents_pair)
+            on_matrix = children_per_second(crossover.generate_all_offspring_matrix, matrix.genes, pairs_array)
+            print(f"{type(crossover).__name__:>16} | {n_ind:>11} | {n_genes:>6} | {per_pair:>12.0f} | {batched:>12.0f} | {on_matrix:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
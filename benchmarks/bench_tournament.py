@@ -0,0 +1,41 @@
+"""Compare utils.k_tournament with utils.fast_k_tournament for growing populations.
+
+Run from the repository root with:
+    python -m benchmarks.bench_tournament
+"""
+from genetic_algorithm.individual import Individual
+from genetic_algorithm.utils import k_tournament, fast_k_tournament
+import random
+import time
+
+POP_SIZES = [1000, 10000, 100000]
+MAX_OLD_SIZE = 20000
+K = 2
+
+
+def time_it(fun, *args) -> float:
+    start = time.perf_counter()
+    fun(*args)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    print(f"{'pop size':>10} | {'k_tournament (s)':>17} | {'fast_k_tournament (s)':>22} | {'ns per champion':>16}")
+    for pop_size in POP_SIZES:
+        # a size multiple of k+1 avoids the empty pool issue of the old implementation
+        pop_size += (K + 1) - pop_size % (K + 1)
+        fit_values = [random.random() for _ in range(pop_size)]
+        fast_time = time_it(fast_k_tournament, K, 2*pop_size, fit_values)
+
+        old_time = float("nan")
+        if pop_size <= MAX_OLD_SIZE:
+            pop = [Individual(1) for _ in range(pop_size)]
+            for ind, fit in zip(pop, fit_values):
+                ind.set_fit_value(fit)
+            old_time = time_it(k_tournament, K, 2*pop_size, pop)
+
+        print(f"{pop_size:>10} | {old_time:>17.4f} | {fast_time:>22.4f} | {1e9*fast_time/(2*pop_size):>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Speed and convergence of Population.evolve on standard test functions, over a grid of population sizes, number of
+genes, crossovers and engines. For each case it records generations per second, evaluations per second, peak memory
+(traced in a separate, shorter run) and the evaluations needed to reach the target of the function.
+
+Run from the repository root with:
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --output results.json --baseline baseline.json --tolerance 0.2
+With a baseline, the cases slower (or using more memory) than the baseline by more than the tolerance are reported
+as regressions and the exit code is 1. Use --quick for a small grid.
+"""
+from genetic_algorithm.population import Population
+from genetic_algorithm.crossover import RandomCrossover, SBXCrossover
+from genetic_algorithm.range import LinearRange
+from typing import Dict, List, Optional
+import argparse
+import datetime
+import itertools
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def sphere(x: List[float]) -> float:
+    return sum([g*g for g in x])
+
+
+def rastrigin(x: List[float]) -> float:
+    return 10.0*len(x) + sum([g*g - 10.0*math.cos(2*math.pi*g) for g in x])
+
+
+def rosenbrock(x: List[float]) -> float:
+    return sum([100.0*(x[i + 1] - x[i]**2)**2 + (1 - x[i])**2 for i in range(len(x) - 1)])
+
+
+def ackley(x: List[float]) -> float:
+    n = len(x)
+    return (-20.0*math.exp(-0.2*math.sqrt(sum([g*g for g in x]) / n))
+            - math.exp(sum([math.cos(2*math.pi*g) for g in x]) / n) + 20.0 + math.e)
+
+
+def sphere_batch(x: "np.ndarray") -> "np.ndarray":
+    return (x**2).sum(axis=1)
+
+
+def rastrigin_batch(x: "np.ndarray") -> "np.ndarray":
+    return 10.0*x.shape[1] + (x**2 - 10.0*np.cos(2*np.pi*x)).sum(axis=1)
+
+
+def rosenbrock_batch(x: "np.ndarray") -> "np.ndarray":
+    return (100.0*(x[:, 1:] - x[:, :-1]**2)**2 + (1 - x[:, :-1])**2).sum(axis=1)
+
+
+def ackley_batch(x: "np.ndarray") -> "np.ndarray":
+    n = x.shape[1]
+    return (-20.0*np.exp(-0.2*np.sqrt((x**2).sum(axis=1) / n))
+            - np.exp(np.cos(2*np.pi*x).sum(axis=1) / n) + 20.0 + np.e)
+
+
+# name -> (function, batch function, (lower, upper) bound of each gene, target)
+FUNCTIONS = {"sphere": (sphere, sphere_batch, (-5.12, 5.12), 1e-2),
+             "rastrigin": (rastrigin, rastrigin_batch, (-5.12, 5.12), 1.0),
+             "rosenbrock": (rosenbrock, rosenbrock_batch, (-2.048, 2.048), 1.0),
+             "ackley": (ackley, ackley_batch, (-32.768, 32.768), 1e-1)}
+CROSSOVERS = {"random": RandomCrossover, "sbx": SBXCrossover}
+
+GRID = {"function": list(FUNCTIONS),
+        "n_individuals": [100, 500],
+        "n_genes": [10, 50],
+        "crossover": list(CROSSOVERS),
+        "engine": ["individual", "matrix"]}
+QUICK_GRID = {"function": list(FUNCTIONS),
+              "n_individuals": [50],
+              "n_genes": [5],
+              "crossover": ["random"],
+              "engine": ["individual", "matrix"]}
+CASE_KEYS = list(GRID)
+# metric -> True if higher is better
+METRICS = {"generations_per_second": True, "evaluations_per_second": True, "peak_memory_bytes": False}
+
+
+def create_population(case: Dict) -> Population:
+    fitness, batch_fitness, (lower, upper), _ = FUNCTIONS[case["function"]]
+    matrix = case["engine"] == "matrix"
+    my_pop = Population(case["n_genes"], case["n_individuals"], batch_fitness if matrix else fitness,
+                        engine=case["engine"], batch_fitness=matrix)
+    my_pop.log["print"] = False
+    my_pop.set_range_from_dict({i: LinearRange(lower, upper) for i in range(case["n_genes"])})
+    my_pop.set_models(crossover=CROSSOVERS[case["crossover"]]())
+    return my_pop
+
+
+def run_case(case: Dict, n_generations: int, memory_generations: int) -> Dict:
+    target = FUNCTIONS[case["function"]][3]
+    to_target = {}
+
+    def record_target(pop: Population, stats: Dict) -> None:
+        if stats["best_fit"] <= target and "evaluations" not in to_target:
+            to_target["evaluations"] = stats["evaluations"]["total"]
+            to_target["generation"] = stats["generation"]
+
+    my_pop = create_population(case)
+    my_pop.add_generation_callback(record_target)
+    start = time.perf_counter()
+    # a negative target, so all the generations are executed
+    best_fit, _, _ = my_pop.evolve(n_generations, target=-1.0)
+    elapsed = time.perf_counter() - start
+    result = {**case,
+              "generations": n_generations,
+              "generations_per_second": n_generations / elapsed,
+              "evaluations_per_second": my_pop.evaluations["total"] / elapsed,
+              "best_fit": best_fit,
+              "target": target,
+              "evaluations_to_target": to_target.get("evaluations"),
+              "generations_to_target": to_target.get("generation"),
+              "stage_seconds": my_pop.timers["total"]}
+
+    # tracemalloc slows down the evolution, so the memory is measured in another run
+    my_pop = create_population(case)
+    tracemalloc.start()
+    my_pop.evolve(memory_generations, target=-1.0)
+    result["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result
+
+
+def run_grid(grid: Dict[str, List], n_generations: int, memory_generations: int) -> List[Dict]:
+    results = []
+    for values in itertools.product(*[grid[key] for key in CASE_KEYS]):
+        case = dict(zip(CASE_KEYS, values))
+        if case["engine"] == "matrix" and np is None:
+            continue
+        result = run_case(case, n_generations, memory_generations)
+        print(" ".join([f"{key}={case[key]}" for key in CASE_KEYS]) +
+              f" | {result['generations_per_second']:9.1f} gen/s | {result['evaluations_per_second']:11.0f} eval/s"
+              f" | {result['peak_memory_bytes'] / 2**20:7.2f} MiB | to target: {result['evaluations_to_target']}")
+        results.append(result)
+    return results
+
+
+def case_id(result: Dict) -> tuple:
+    return tuple([result[key] for key in CASE_KEYS])
+
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """Return a description of each metric that is worse than the baseline by more than the tolerance (relative).
+    The cases missing in the baseline are ignored."""
+    baseline = {case_id(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        reference = baseline.get(case_id(result))
+        if reference is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if not reference.get(metric):
+                continue
+            change = result[metric] / reference[metric] - 1.0
+            if (change < -tolerance) if higher_is_better else (change > tolerance):
+                name = " ".join([f"{key}={result[key]}" for key in CASE_KEYS])
+                regressions.append(f"{name} | {metric}: {reference[metric]:.4g} -> {result[metric]:.4g} ({100*change:+.1f}%)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON file with the results")
+    parser.add_argument("--generations", type=int, default=200, help="generations of each timed run")
+    parser.add_argument("--memory-generations", type=int, default=10, help="generations of each memory run")
+    parser.add_argument("--quick", action="store_true", help="run a small grid")
+    parser.add_argument("--baseline", help="JSON file of a previous run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="relative change reported as a regression")
+    args = parser.parse_args(argv)
+
+    results = run_grid(QUICK_GRID if args.quick else GRID, args.generations, args.memory_generations)
+    with open(args.output, "w") as f:
+        json.dump({"metadata": {"date": datetime.datetime.now().isoformat(timespec="seconds"),
+                                "python": sys.version.split()[0],
+                                "platform": platform.platform(),
+                                "numpy": np.__version__ if np is not None else None,
+                                "generations": args.generations},
+                   "results": results}, f, indent=1)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            regressions = compare(results, json.load(f)["results"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        print(f"{len(regressions)} regressions against {args.baseline} (tolerance {100*args.tolerance:.0f}%)")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
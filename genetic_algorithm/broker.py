@@ -0,0 +1,230 @@
+from .evaluator import BaseEvaluator, evaluate_chunk
+from .utils import np, pack_doubles, unpack_doubles
+from itertools import chain
+from typing import Callable, List, Optional, Tuple
+import argparse
+import importlib
+import queue
+import socket
+import struct
+import threading
+import time
+
+HEADER = struct.Struct("!cI")
+TASK_HEADER = struct.Struct("!QII")
+RESULT_HEADER = struct.Struct("!QI")
+
+
+def pack_rows(all_real_genes: List[List[float]]) -> Tuple[int, bytes]:
+    """Return the number of genes and the packed rows of a list of real genes (or a 2-D numpy array)."""
+    if np is not None and isinstance(all_real_genes, np.ndarray):
+        return all_real_genes.shape[1], np.ascontiguousarray(all_real_genes, dtype=">f8").tobytes()
+    return len(all_real_genes[0]), pack_doubles(chain.from_iterable(all_real_genes))
+
+
+def send_message(sock: socket.socket, kind: bytes, payload: bytes) -> None:
+    sock.sendall(HEADER.pack(kind, len(payload)) + payload)
+
+
+def receive_exactly(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(min(size - len(data), 1 << 20))
+        if not chunk:
+            raise ConnectionError("The connection was closed.")
+        data.extend(chunk)
+    return bytes(data)
+
+
+def receive_message(sock: socket.socket) -> Tuple[bytes, bytes]:
+    kind, size = HEADER.unpack(receive_exactly(sock, HEADER.size))
+    return kind, receive_exactly(sock, size)
+
+
+class BrokerEvaluator(BaseEvaluator):
+    """Evaluate the individuals in the workers connected to (host, port), possibly on other machines. The individuals
+    are split in tasks of task_size rows, which are handed out to the workers as soon as they are free. If a worker
+    disconnects, its task is sent again to another worker. The fitness_fun received by evaluate_all is not used,
+    each worker evaluates with its own function (and batch mode, see run_worker).
+    With port=0 a free port is chosen, it is available at self.address. If timeout is set, evaluate_all raises an
+    exception when the results are not received in timeout seconds (e.g. no worker is connected), the tasks left
+    are cancelled and their late results dropped. If task_timeout is set, a worker that does not answer a task in
+    task_timeout seconds is disconnected and its task is sent again to another worker. Without it, a hung worker
+    keeps its task and only the timeout of evaluate_all ends the wait.
+
+    Each message is a (kind, payload size) header followed by the payload, all the numbers in network byte order:
+        T (task)   -> task id, number of rows, number of genes, rows*genes doubles
+        R (result) -> task id, number of values, values as doubles
+        E (error)  -> task id, utf-8 error message
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, task_size: int = 16, timeout: Optional[float] = None,
+                 task_timeout: Optional[float] = None) -> None:
+        self.task_size = task_size
+        self.timeout = timeout
+        self.task_timeout = task_timeout
+        self.tasks = queue.Queue()
+        # ids of the tasks of the running evaluate_all, the answers to other tasks are dropped
+        self.pending = set()
+        self.results = {}
+        self.errors = {}
+        self.condition = threading.Condition()
+        self.next_task_id = 0
+        self.workers = []
+        self.closed = False
+
+        self.server = socket.create_server((host, port))
+        self.address = self.server.getsockname()[:2]
+        self.accept_thread = threading.Thread(target=self.accept_workers, daemon=True)
+        self.accept_thread.start()
+
+    def num_of_workers(self) -> int:
+        with self.condition:
+            return len(self.workers)
+
+    def accept_workers(self) -> None:
+        while not self.closed:
+            try:
+                connection, _ = self.server.accept()
+            except OSError:
+                return
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            connection.settimeout(self.task_timeout)
+            with self.condition:
+                self.workers.append(connection)
+            threading.Thread(target=self.serve_worker, args=(connection,), daemon=True).start()
+
+    def serve_worker(self, connection: socket.socket) -> None:
+        """Send the tasks to a worker, one at a time. If the worker disconnects (or does not answer in task_timeout
+        seconds), its task goes back to the queue."""
+        while not self.closed:
+            try:
+                task = self.tasks.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            task_id, n_genes, payload = task
+            with self.condition:
+                if task_id not in self.pending:
+                    # cancelled by a timeout or a failure of evaluate_all
+                    continue
+            try:
+                send_message(connection, b"T", TASK_HEADER.pack(task_id, len(payload) // (8*n_genes), n_genes) + payload)
+                kind, answer = receive_message(connection)
+            except (OSError, ConnectionError):
+                self.tasks.put(task)
+                break
+            self.store_answer(kind, answer)
+
+        with self.condition:
+            if connection in self.workers:
+                self.workers.remove(connection)
+        connection.close()
+
+    def store_answer(self, kind: bytes, answer: bytes) -> None:
+        with self.condition:
+            if kind == b"R":
+                task_id, _ = RESULT_HEADER.unpack_from(answer)
+                if task_id in self.pending:
+                    self.results[task_id] = unpack_doubles(answer[RESULT_HEADER.size:])
+            else:
+                task_id, = struct.unpack_from("!Q", answer)
+                if task_id in self.pending:
+                    self.errors[task_id] = answer[8:].decode("utf-8")
+            self.condition.notify_all()
+
+    def evaluate_all(self, fitness_fun: Callable, all_real_genes: List[List[float]], batch: bool = False) -> List[float]:
+        if len(all_real_genes) == 0:
+            return []
+        tasks = []
+        for i in range(0, len(all_real_genes), self.task_size):
+            n_genes, payload = pack_rows(all_real_genes[i:i + self.task_size])
+            tasks.append((self.next_task_id, n_genes, payload))
+            self.next_task_id += 1
+        task_ids = [task[0] for task in tasks]
+        with self.condition:
+            self.pending.update(task_ids)
+        for task in tasks:
+            self.tasks.put(task)
+
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        with self.condition:
+            try:
+                while not all([task_id in self.results or task_id in self.errors for task_id in task_ids]):
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise Exception(f"The workers did not return the results in {self.timeout} seconds.")
+                    self.condition.wait(remaining)
+                errors = [self.errors[task_id] for task_id in task_ids if task_id in self.errors]
+                all_fit = [self.results.get(task_id, []) for task_id in task_ids]
+            finally:
+                # cancel the tasks left in the queue and drop the answers, also on a timeout
+                self.pending.difference_update(task_ids)
+                for task_id in task_ids:
+                    self.results.pop(task_id, None)
+                    self.errors.pop(task_id, None)
+        if errors:
+            raise Exception(f"A worker failed to evaluate the fitness function: {errors[0]}")
+        return list(chain.from_iterable(all_fit))
+
+    def close(self) -> None:
+        self.closed = True
+        with self.condition:
+            # shutdown wakes up the threads blocked in accept / recv
+            for sock in [self.server] + self.workers:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                sock.close()
+            self.workers = []
+
+
+def run_worker(host: str, port: int, fitness_fun: Callable, batch: bool = False, retry_time: float = 5.0) -> None:
+    """Entry point of a worker, also available from the command line:
+        python -m genetic_algorithm.broker <host> <port> <module>:<fitness function> [--batch]
+    Connect to a BrokerEvaluator and evaluate the received tasks until the broker closes the connection. In batch
+    mode the fitness_fun receives a 2-D numpy array, as in Population(batch_fitness=True). The connection is retried
+    for retry_time seconds, so the workers can be started before the broker."""
+    deadline = time.monotonic() + retry_time
+    while True:
+        try:
+            sock = socket.create_connection((host, port))
+            break
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    with sock:
+        while True:
+            try:
+                _, task = receive_message(sock)
+            except (OSError, ConnectionError):
+                return
+            task_id, n_rows, n_genes = TASK_HEADER.unpack_from(task)
+            values = unpack_doubles(task[TASK_HEADER.size:])
+            all_real_genes = [values[i*n_genes:(i + 1)*n_genes] for i in range(n_rows)]
+            try:
+                all_fit = evaluate_chunk(fitness_fun, all_real_genes, batch)
+                message = (b"R", RESULT_HEADER.pack(task_id, len(all_fit)) + pack_doubles(all_fit))
+            except Exception as e:
+                message = (b"E", struct.pack("!Q", task_id) + f"{type(e).__name__}: {e}".encode("utf-8"))
+            try:
+                send_message(sock, *message)
+            except OSError:
+                return
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fitness worker for genetic_algorithm.broker.BrokerEvaluator")
+    parser.add_argument("host")
+    parser.add_argument("port", type=int)
+    parser.add_argument("fitness", help="<module>:<function>")
+    parser.add_argument("--batch", action="store_true", help="the function receives a 2-D numpy array")
+    args = parser.parse_args()
+    module_name, function_name = args.fitness.split(":")
+    run_worker(args.host, args.port, getattr(importlib.import_module(module_name), function_name), batch=args.batch)
+
+
+if __name__ == "__main__":
+    main()
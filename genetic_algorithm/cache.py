@@ -0,0 +1,131 @@
+from abc import ABC, abstractmethod
+from array import array
+from collections import OrderedDict
+from typing import List, Optional
+import sqlite3
+
+
+class BaseFitnessCache(ABC):
+    """Framework to model fitness caches. The cache is placed in front of the fitness function and is keyed by
+    the gene vector, so repeated individuals are not evaluated again.
+    """
+    def __init__(self, resolution: float = 0.0) -> None:
+        self.resolution = resolution
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, genes: List[float]) -> bytes:
+        """Exact key by default. With a resolution, genes closer than it share the same key."""
+        if self.resolution:
+            return array("q", [round(g / self.resolution) for g in genes]).tobytes()
+        return array("d", genes).tobytes()
+
+    @abstractmethod
+    def get(self, genes: List[float]) -> Optional[float]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def put(self, genes: List[float], fit: float) -> None:
+        raise NotImplementedError
+
+    def get_many(self, all_genes: List[List[float]]) -> List[Optional[float]]:
+        return [self.get(genes) for genes in all_genes]
+
+    def put_many(self, all_genes: List[List[float]], all_fit: List[float]) -> None:
+        for genes, fit in zip(all_genes, all_fit):
+            self.put(genes, fit)
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def flush(self) -> None:
+        """Write any pending entry. Called by the Population at the end of evolve."""
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+
+class FitnessCache(BaseFitnessCache):
+    """In memory cache with a maximum number of entries. The least recently used entry is evicted first."""
+    def __init__(self, max_size: int = 100000, resolution: float = 0.0) -> None:
+        super().__init__(resolution)
+        self.max_size = max_size
+        self.entries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, genes: List[float]) -> Optional[float]:
+        key = self.key(genes)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, genes: List[float], fit: float) -> None:
+        key = self.key(genes)
+        self.entries[key] = fit
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+
+class SqliteFitnessCache(BaseFitnessCache):
+    """Persistent cache stored in a sqlite database, so the evaluations are shared across runs. The entries are
+    keyed by the gene vector and a version tag, change the version whenever the fitness function changes.
+    New entries are kept in memory and written in a single transaction every batch_size entries (or on flush).
+    """
+    MAX_QUERY_PARAMS = 500
+
+    def __init__(self, path: str, version: str = "", resolution: float = 0.0, batch_size: int = 1000) -> None:
+        super().__init__(resolution)
+        self.path = path
+        self.version = version
+        self.batch_size = batch_size
+        self.pending = {}
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS fitness (version TEXT, genes BLOB, fit REAL, "
+                                "PRIMARY KEY (version, genes)) WITHOUT ROWID")
+        self.connection.commit()
+
+    def get(self, genes: List[float]) -> Optional[float]:
+        return self.get_many([genes])[0]
+
+    def put(self, genes: List[float], fit: float) -> None:
+        self.put_many([genes], [fit])
+
+    def get_many(self, all_genes: List[List[float]]) -> List[Optional[float]]:
+        all_keys = [self.key(genes) for genes in all_genes]
+        found = {key: self.pending[key] for key in all_keys if key in self.pending}
+        to_query = list({key for key in all_keys if key not in found})
+        for i in range(0, len(to_query), self.MAX_QUERY_PARAMS):
+            chunk = to_query[i:i + self.MAX_QUERY_PARAMS]
+            query = f"SELECT genes, fit FROM fitness WHERE version = ? AND genes IN ({','.join(['?']*len(chunk))})"
+            found.update(self.connection.execute(query, [self.version, *chunk]).fetchall())
+
+        all_fit = [found.get(key) for key in all_keys]
+        n_hits = len(all_fit) - all_fit.count(None)
+        self.hits += n_hits
+        self.misses += len(all_fit) - n_hits
+        return all_fit
+
+    def put_many(self, all_genes: List[List[float]], all_fit: List[float]) -> None:
+        for genes, fit in zip(all_genes, all_fit):
+            self.pending[self.key(genes)] = fit
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.pending:
+            with self.connection:
+                self.connection.executemany("INSERT OR REPLACE INTO fitness (version, genes, fit) VALUES (?, ?, ?)",
+                                            [(self.version, key, fit) for key, fit in self.pending.items()])
+            self.pending = {}
+
+    def close(self) -> None:
+        self.flush()
+        self.connection.close()
@@ -0,0 +1,77 @@
+from .individual import Individual
+from .matrix import PopulationMatrix
+from .utils import np, pack_doubles, unpack_doubles
+from itertools import chain
+from typing import Any, Dict, List, Tuple
+import os
+import pickle
+import struct
+
+MAGIC = b"GACP"
+VERSION = 1
+# magic, version, number of individuals, number of genes, generation, size of the pickled state
+# the file is little endian, so the arrays are written without conversion on most machines
+HEADER = struct.Struct("<4sHQQQQ")
+
+
+def save_checkpoint(path: str, pop: List[Individual], generation: int, state: Dict[str, Any]) -> None:
+    """Write the whole population (a list of individuals or a PopulationMatrix) to a binary file: a header followed by
+    the genes, the fitness values and the require update flags as flat arrays of doubles / bytes, and the pickled
+    state (random states, stall control, ...). The file is written next to the target and moved with os.replace,
+    so a checkpoint is never left half written."""
+    if isinstance(pop, PopulationMatrix):
+        n_genes = pop.get_num_of_genes()
+        genes = np.ascontiguousarray(pop.genes, dtype="<f8")
+        fit = np.ascontiguousarray(pop.fit_values, dtype="<f8")
+        flags = pop.require_update.view(np.uint8)
+    else:
+        n_genes = pop[0].get_num_of_genes()
+        genes = pack_doubles(chain.from_iterable([ind.genes_view() for ind in pop]), "little")
+        fit = pack_doubles([ind.fit() for ind in pop], "little")
+        flags = bytes([ind.require_update() for ind in pop])
+    state = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(pop), n_genes, generation, len(state)))
+        f.write(genes)
+        f.write(fit)
+        f.write(flags)
+        f.write(state)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str, engine: str = "individual", reverse: bool = False,
+                    individual_class: type = Individual) -> Tuple[List[Individual], int, Dict[str, Any]]:
+    """Return (population, generation, state) from a file written by save_checkpoint. The population is a list of
+    individual_class or a PopulationMatrix, according to the engine."""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, n_ind, n_genes, generation, state_size = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise Exception(f"{path} is not a checkpoint file (or was written by another version).")
+    genes_end = HEADER.size + 8*n_ind*n_genes
+    fit_end = genes_end + 8*n_ind
+    flags_end = fit_end + n_ind
+    if len(data) != flags_end + state_size:
+        raise Exception(f"The checkpoint file {path} is truncated.")
+    state = pickle.loads(data[flags_end:])
+
+    if engine == "matrix":
+        pop = PopulationMatrix(np.frombuffer(data, dtype="<f8", count=n_ind*n_genes, offset=HEADER.size).reshape(n_ind, n_genes).astype(np.float64),
+                               reverse=reverse)
+        pop.fit_values = np.frombuffer(data, dtype="<f8", count=n_ind, offset=genes_end).astype(np.float64)
+        pop.require_update = np.frombuffer(data, dtype=np.uint8, count=n_ind, offset=fit_end).astype(bool)
+        return pop, generation, state
+
+    all_genes = unpack_doubles(data[HEADER.size:genes_end], "little")
+    all_fit = unpack_doubles(data[genes_end:fit_end], "little")
+    pop = []
+    for i in range(n_ind):
+        ind = individual_class(n_genes, list_of_genes=all_genes[i*n_genes:(i + 1)*n_genes], reverse=reverse)
+        if not data[fit_end + i]:
+            ind.set_fit_value(all_fit[i])
+        pop.append(ind)
+    return pop, generation, state
@@ -1,21 +1,61 @@
 from abc import ABC, abstractmethod
-from .individual import Individual
+from .individual import Individual, LOWER_GENE, UPPER_GENE
+from .utils import np, generate_random_matrix
+from .rng import DEFAULT_STREAM, RandomStream
 from typing import List, Tuple
-import random
 
 
-def generate_random_number() -> float:
-    return random.uniform(0.0, 1.0)
+def random_crossover_kernel(parent_1: "np.ndarray", parent_2: "np.ndarray", rng: RandomStream = None) -> "np.ndarray":
+    """Uniform crossover of all the pairs at once. Row i of parent_1 and parent_2 generate the rows 2*i and
+    2*i + 1 of the children matrix."""
+    swap = generate_random_matrix(parent_1.shape, rng) <= 0.5
+    # this ensures that at least one gene is swapped
+    swap[swap.all(axis=1), -1] = False
+
+    children = np.empty((2*len(parent_1), parent_1.shape[1]))
+    children[0::2] = np.where(swap, parent_2, parent_1)
+    children[1::2] = np.where(swap, parent_1, parent_2)
+    return children
+
+
+def sbx_kernel(parent_1: "np.ndarray", parent_2: "np.ndarray", n: float, rng: RandomStream = None) -> "np.ndarray":
+    """SBX crossover of all the pairs at once, with one beta per pair. Same children layout of random_crossover_kernel."""
+    u = generate_random_matrix((len(parent_1), 1), rng)
+    b = np.where(u < 0.5, (2*u)**(1 / (n + 1)), (0.5 / (1 - u))**(1 / (n + 1)))
+
+    children = np.empty((2*len(parent_1), parent_1.shape[1]))
+    children[0::2] = 0.5*(1 + b)*parent_1 + (1 - b)*parent_2
+    children[1::2] = 0.5*(1 - b)*parent_1 + (1 + b)*parent_2
+    return np.clip(children, LOWER_GENE, UPPER_GENE, out=children)
+
+
+def gather_parents(parents: List[Individual], parents_pair: List[Tuple[int, int]]) -> Tuple["np.ndarray", "np.ndarray"]:
+    genes = [[parents[i].genes_view() for i in pair] for pair in parents_pair]
+    parents_genes = np.array(genes, dtype=np.float64).reshape(len(parents_pair), 2, -1)
+    return parents_genes[:, 0], parents_genes[:, 1]
+
+
+def create_children(children_genes: "np.ndarray", individual_class: type = Individual) -> List[Individual]:
+    n_genes = children_genes.shape[1]
+    return [individual_class(n_genes, list_of_genes=genes) for genes in children_genes.tolist()]
 
 
 class BaseCrossover(ABC):
+    # source of the random numbers, replaced by the "crossover" stream of a seeded Population
+    rng = DEFAULT_STREAM
+
     @abstractmethod
     def generate_all_offspring(self, parents: List[Individual], parents_pair: List[Tuple[int, int]]) -> List[Individual]:
         raise NotImplementedError
 
+    def generate_all_offspring_matrix(self, parents: "np.ndarray", parents_pair: "np.ndarray") -> "np.ndarray":
+        """Matrix engine version. Receives the genes matrix and the (n_pairs x 2) array of indexes and
+        returns the genes matrix of the children."""
+        raise NotImplementedError(f"{type(self).__name__} does not support the matrix engine.")
+
 
 class RandomCrossover(BaseCrossover):
-    
+
     def __init__(self, children_ratio: float = 0.7) -> None:
         self.children_ration = children_ratio
 
@@ -25,23 +65,32 @@ class RandomCrossover(BaseCrossover):
         n_genes = len(children_1_genes)
         count_crossovers = 0
 
-        for i in range(n_genes):
-            if generate_random_number() <= 0.5:
+        for i, u in enumerate(self.rng.numbers(n_genes)):
+            if u <= 0.5:
                 count_crossovers += 1
                 children_1_genes[i], children_2_genes[i] = children_2_genes[i], children_1_genes[i]
         # this ensures that at least one gene is swapped
         if count_crossovers == n_genes:
             children_1_genes[-1], children_2_genes[-1] = children_2_genes[-1], children_1_genes[-1]
-        
-        return [Individual(n_genes, list_of_genes=children_1_genes), Individual(n_genes, list_of_genes=children_2_genes)]
+
+        individual_class = type(parent_1)
+        return [individual_class(n_genes, list_of_genes=children_1_genes), individual_class(n_genes, list_of_genes=children_2_genes)]
 
     def generate_all_offspring(self, parents: List[Individual], parents_pair: List[Tuple[int, int]]) -> List[Individual]:
+        """If numpy is available, all the children are generated at once with random_crossover_kernel."""
+        parents_pair = parents_pair[:int(self.children_ration*len(parents_pair))]
+        if np is not None and parents_pair:
+            return create_children(random_crossover_kernel(*gather_parents(parents, parents_pair), self.rng), type(parents[0]))
         list_of_children = []
-        for i in range(int(self.children_ration*len(parents_pair))):
-            parent_1, parent_2  = parents[parents_pair[i][0]], parents[parents_pair[i][1]]
+        for pair in parents_pair:
+            parent_1, parent_2  = parents[pair[0]], parents[pair[1]]
             list_of_children.extend(self.generate_offspring(parent_1, parent_2))
         return list_of_children
 
+    def generate_all_offspring_matrix(self, parents: "np.ndarray", parents_pair: "np.ndarray") -> "np.ndarray":
+        parents_pair = parents_pair[:int(self.children_ration*len(parents_pair))]
+        return random_crossover_kernel(parents[parents_pair[:, 0]], parents[parents_pair[:, 1]], self.rng)
+
 
 class SBXCrossover(BaseCrossover):
     """Based on https://stackoverflow.com/questions/22457941/simulated-binary-crossover-sbx-crossover-operator-example"""
@@ -50,24 +99,32 @@ class SBXCrossover(BaseCrossover):
         self.children_ratio = children_ratio
 
     def generate_offspring(self, parent_1: Individual, parent_2: Individual) -> List[Individual]:
-        u = generate_random_number()
+        u = self.rng.number()
         if u < 0.5:
             b = (2*u)**(1 / (self.n + 1))
         else:
             b = (0.5 / (1 - u))**(1 / (self.n + 1))
-        
+
         p_1 = parent_1.genes()
         p_2 = parent_2.genes()
         c_1 = [0.5*(1 + b)*p1 + (1 - b)*p2 for p1, p2 in zip(p_1,p_2)]
         c_2 = [0.5*(1 - b)*p1 + (1 + b)*p2 for p1, p2 in zip(p_1,p_2)]
 
         n_gen = len(p_1)
-        return [Individual(n_gen, list_of_genes=c_1), Individual(n_gen, list_of_genes=c_2)]
+        individual_class = type(parent_1)
+        return [individual_class(n_gen, list_of_genes=c_1), individual_class(n_gen, list_of_genes=c_2)]
 
     def generate_all_offspring(self, parents: List[Individual], parents_pair: List[Tuple[int, int]]) -> List[Individual]:
+        """If numpy is available, all the children are generated at once with sbx_kernel."""
+        parents_pair = parents_pair[:int(self.children_ratio*len(parents_pair))]
+        if np is not None and parents_pair:
+            return create_children(sbx_kernel(*gather_parents(parents, parents_pair), self.n, self.rng), type(parents[0]))
         list_of_children = []
-        for i in range(int(self.children_ratio*len(parents_pair))):
-            parent_1, parent_2  = parents[parents_pair[i][0]], parents[parents_pair[i][1]]
+        for pair in parents_pair:
+            parent_1, parent_2  = parents[pair[0]], parents[pair[1]]
             list_of_children.extend(self.generate_offspring(parent_1, parent_2))
         return list_of_children
 
+    def generate_all_offspring_matrix(self, parents: "np.ndarray", parents_pair: "np.ndarray") -> "np.ndarray":
+        parents_pair = parents_pair[:int(self.children_ratio*len(parents_pair))]
+        return sbx_kernel(parents[parents_pair[:, 0]], parents[parents_pair[:, 1]], self.n, self.rng)
@@ -0,0 +1,228 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from .utils import np
+from typing import Callable, List, Optional, Tuple
+import asyncio
+import math
+import os
+
+
+class BaseEvaluator(ABC):
+    """Framework to model fitness evaluators. An evaluator receives the real genes of several individuals
+    and must return their fitness values in the same order.
+    """
+    @abstractmethod
+    def evaluate_all(self, fitness_fun: Callable, all_real_genes: List[List[float]], batch: bool = False) -> List[float]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release the resources held by the evaluator (e.g. worker pools)."""
+        pass
+
+    def __enter__(self) -> "BaseEvaluator":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def evaluate_chunk(fitness_fun: Callable, all_real_genes: List[List[float]], batch: bool = False) -> List[float]:
+    """Evaluate a list of real genes. In batch mode the fitness_fun is called only once with a 2-D array."""
+    if not batch:
+        return [fitness_fun(real_genes) for real_genes in all_real_genes]
+    return check_batch_fit(fitness_fun(np.asarray(all_real_genes, dtype=np.float64)), len(all_real_genes))
+
+
+def check_batch_fit(all_fit: "np.ndarray", n_individuals: int) -> List[float]:
+    all_fit = np.asarray(all_fit, dtype=np.float64)
+    if all_fit.shape != (n_individuals,):
+        raise Exception(f"The batch fitness function returned a wrong shape. Expected: {(n_individuals,)}, found: {all_fit.shape}.")
+    return all_fit.tolist()
+
+
+class SerialEvaluator(BaseEvaluator):
+    """Evaluate all the individuals in the current process, one after the other."""
+    def evaluate_all(self, fitness_fun: Callable, all_real_genes: List[List[float]], batch: bool = False) -> List[float]:
+        return evaluate_chunk(fitness_fun, all_real_genes, batch)
+
+
+class PoolEvaluator(BaseEvaluator):
+    """Split the individuals in chunks and evaluate them in a pool of workers. The pool is created on the first
+    call and reused by the following generations. If chunk_size is None, each worker receives about 4 chunks.
+    """
+    def __init__(self, n_workers: Optional[int] = None, chunk_size: Optional[int] = None) -> None:
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.pool = None
+
+    @abstractmethod
+    def create_pool(self, fitness_fun: Callable) -> Executor:
+        raise NotImplementedError
+
+    def get_pool(self, fitness_fun: Callable) -> Executor:
+        if self.pool is None:
+            self.pool = self.create_pool(fitness_fun)
+        return self.pool
+
+    def split_in_chunks(self, all_real_genes: List[List[float]]) -> List[List[List[float]]]:
+        chunk_size = self.chunk_size or math.ceil(len(all_real_genes) / (4*self.n_workers))
+        return [all_real_genes[i:i + chunk_size] for i in range(0, len(all_real_genes), chunk_size)]
+
+    def evaluate_all(self, fitness_fun: Callable, all_real_genes: List[List[float]], batch: bool = False) -> List[float]:
+        chunks = self.split_in_chunks(all_real_genes)
+        all_fit = []
+        # map returns the results in the same order of the chunks
+        for chunk_fit in self.map_chunks(self.get_pool(fitness_fun), fitness_fun, chunks, batch):
+            all_fit.extend(chunk_fit)
+        return all_fit
+
+    def map_chunks(self, pool: Executor, fitness_fun: Callable, chunks: List[List[List[float]]], batch: bool) -> List[List[float]]:
+        return pool.map(evaluate_chunk, [fitness_fun]*len(chunks), chunks, [batch]*len(chunks))
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+
+class ThreadPoolEvaluator(PoolEvaluator):
+    """Useful when the fitness function releases the GIL (numpy, I/O, external simulators)."""
+    def create_pool(self, fitness_fun: Callable) -> Executor:
+        return ThreadPoolExecutor(max_workers=self.n_workers)
+
+
+_worker_fitness_fun = None
+
+
+def _init_worker(fitness_fun: Callable) -> None:
+    global _worker_fitness_fun
+    _worker_fitness_fun = fitness_fun
+
+
+def _evaluate_worker_chunk(all_real_genes: List[List[float]], batch: bool = False) -> List[float]:
+    return evaluate_chunk(_worker_fitness_fun, all_real_genes, batch)
+
+
+class ProcessPoolEvaluator(PoolEvaluator):
+    """Evaluate the chunks in other processes. The fitness function must be picklable (e.g. defined at module level),
+    it is sent only once to each worker when the pool is created. Changing the fitness function recreates the pool.
+    """
+    def __init__(self, n_workers: Optional[int] = None, chunk_size: Optional[int] = None) -> None:
+        super().__init__(n_workers, chunk_size)
+        self.pool_fitness_fun = None
+
+    def create_pool(self, fitness_fun: Callable) -> Executor:
+        self.pool_fitness_fun = fitness_fun
+        return ProcessPoolExecutor(max_workers=self.n_workers, initializer=_init_worker, initargs=(fitness_fun,))
+
+    def get_pool(self, fitness_fun: Callable) -> Executor:
+        if self.pool is not None and self.pool_fitness_fun is not fitness_fun:
+            self.close()
+        return super().get_pool(fitness_fun)
+
+    def map_chunks(self, pool: Executor, fitness_fun: Callable, chunks: List[List[List[float]]], batch: bool) -> List[List[float]]:
+        return pool.map(_evaluate_worker_chunk, chunks, [batch]*len(chunks))
+
+
+_worker_shared_memory = {}
+
+
+def _evaluate_shared_rows(genes_name: str, fit_name: str, n_rows: int, n_genes: int, start: int, stop: int, batch: bool = False) -> None:
+    """Evaluate the rows [start, stop) of the shared genes matrix and write their fitness values in the shared result
+    vector. The blocks are attached once per worker, the blocks of previous calls are released."""
+    for name in [name for name in _worker_shared_memory if name not in (genes_name, fit_name)]:
+        _worker_shared_memory.pop(name).close()
+    for name in (genes_name, fit_name):
+        if name not in _worker_shared_memory:
+            _worker_shared_memory[name] = shared_memory.SharedMemory(name=name)
+
+    genes = np.ndarray((n_rows, n_genes), dtype=np.float64, buffer=_worker_shared_memory[genes_name].buf)
+    all_fit = np.ndarray((n_rows,), dtype=np.float64, buffer=_worker_shared_memory[fit_name].buf)
+    rows = genes[start:stop] if batch else genes[start:stop].tolist()
+    all_fit[start:stop] = evaluate_chunk(_worker_fitness_fun, rows, batch)
+
+
+class SharedMemoryEvaluator(ProcessPoolEvaluator):
+    """Process pool evaluator for large genomes. The real genes of each call are copied to a shared memory block and
+    the workers only receive the range of rows to evaluate, writing the fitness values in a shared result block, so
+    the data sent to the workers does not depend on the number of genes. The blocks are reused while they are large
+    enough and released by close(). Requires numpy and a picklable fitness function.
+    """
+    def __init__(self, n_workers: Optional[int] = None, chunk_size: Optional[int] = None) -> None:
+        if np is None:
+            raise ImportError("The SharedMemoryEvaluator requires numpy.")
+        super().__init__(n_workers, chunk_size)
+        self.genes_memory = None
+        self.fit_memory = None
+
+    def get_shared_arrays(self, n_rows: int, n_genes: int) -> Tuple["np.ndarray", "np.ndarray"]:
+        if self.genes_memory is None or self.genes_memory.size < 8*n_rows*n_genes or self.fit_memory.size < 8*n_rows:
+            self.release_memory()
+            self.genes_memory = shared_memory.SharedMemory(create=True, size=max(8*n_rows*n_genes, 8))
+            self.fit_memory = shared_memory.SharedMemory(create=True, size=max(8*n_rows, 8))
+        return (np.ndarray((n_rows, n_genes), dtype=np.float64, buffer=self.genes_memory.buf),
+                np.ndarray((n_rows,), dtype=np.float64, buffer=self.fit_memory.buf))
+
+    def evaluate_all(self, fitness_fun: Callable, all_real_genes: List[List[float]], batch: bool = False) -> List[float]:
+        n_rows = len(all_real_genes)
+        if n_rows == 0:
+            return []
+        n_genes = len(all_real_genes[0])
+        pool = self.get_pool(fitness_fun)
+        shared_genes, shared_fit = self.get_shared_arrays(n_rows, n_genes)
+        shared_genes[:] = all_real_genes
+
+        chunk_size = self.chunk_size or math.ceil(n_rows / (4*self.n_workers))
+        starts = list(range(0, n_rows, chunk_size))
+        stops = [min(start + chunk_size, n_rows) for start in starts]
+        n_chunks = len(starts)
+        # wait for all the chunks (and raise their exceptions) before reading the results
+        list(pool.map(_evaluate_shared_rows, [self.genes_memory.name]*n_chunks, [self.fit_memory.name]*n_chunks,
+                      [n_rows]*n_chunks, [n_genes]*n_chunks, starts, stops, [batch]*n_chunks))
+        return shared_fit.tolist()
+
+    def release_memory(self) -> None:
+        for memory in (self.genes_memory, self.fit_memory):
+            if memory is not None:
+                memory.close()
+                memory.unlink()
+        self.genes_memory = None
+        self.fit_memory = None
+
+    def close(self) -> None:
+        super().close()
+        self.release_memory()
+
+
+class AsyncEvaluator(BaseEvaluator):
+    """Evaluate a coroutine fitness function (async def) for I/O bound problems. All the individuals of a call are
+    evaluated concurrently, with at most `limit` evaluations running at the same time. The event loop is created on
+    the first call and reused by the following generations, so it cannot be used inside an already running loop.
+    In batch mode the coroutine is awaited only once with the 2-D array.
+    """
+    def __init__(self, limit: int = 100) -> None:
+        self.limit = limit
+        self.loop = None
+
+    def evaluate_all(self, fitness_fun: Callable, all_real_genes: List[List[float]], batch: bool = False) -> List[float]:
+        if self.loop is None:
+            self.loop = asyncio.new_event_loop()
+        return self.loop.run_until_complete(self.evaluate_all_async(fitness_fun, all_real_genes, batch))
+
+    async def evaluate_all_async(self, fitness_fun: Callable, all_real_genes: List[List[float]], batch: bool = False) -> List[float]:
+        if batch:
+            return check_batch_fit(await fitness_fun(np.asarray(all_real_genes, dtype=np.float64)), len(all_real_genes))
+        semaphore = asyncio.Semaphore(self.limit)
+
+        async def evaluate(real_genes: List[float]) -> float:
+            async with semaphore:
+                return await fitness_fun(real_genes)
+
+        # gather keeps the results in the same order of the individuals
+        return list(await asyncio.gather(*[evaluate(real_genes) for real_genes in all_real_genes]))
+
+    def close(self) -> None:
+        if self.loop is not None:
+            self.loop.close()
+            self.loop = None
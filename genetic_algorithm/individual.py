@@ -1,6 +1,7 @@
+from array import array
 from math import inf
-from typing import List
-from random import uniform
+from typing import Dict, List, Sequence
+from .rng import DEFAULT_STREAM, RandomStream
 
 LOWER_GENE = 0.0
 UPPER_GENE = 1.0
@@ -10,7 +11,7 @@ DEFAULT_FIT = inf
 class Individual:
     def __init__(self, num_of_genes: int, list_of_genes: List[float] = [], reverse: bool = False) -> None:
         self.__num_of_genes = num_of_genes
-        self.__list_of_genes = [0.0 for _ in range(self.__num_of_genes)]
+        self.__list_of_genes = [0.0] * self.__num_of_genes
         self.__fit = DEFAULT_FIT
         self.__require_update = True
         self.__reverse = reverse
@@ -71,6 +72,10 @@ class Individual:
     def genes(self) -> List[float]:
         return self.__list_of_genes.copy()
 
+    def genes_view(self) -> Sequence[float]:
+        """Return the genes without copying them, for read only hot paths. It must not be modified."""
+        return self.__list_of_genes
+
     def set_new_gene_value(self, gene_index: int, new_value: float) -> None:
         self.__list_of_genes[gene_index] = max(min(new_value, UPPER_GENE), LOWER_GENE)
         self.__require_update = True
@@ -78,17 +83,141 @@ class Individual:
     def set_all_genes(self, new_genes_list: List[float]) -> None:
         if len(new_genes_list) != self.__num_of_genes:
             raise Exception(f"The new gene list has a different amount of parameters. Expected: {self.__num_of_genes}, found: {len(new_genes_list)}.")
-        for g in range(self.__num_of_genes):
-            self.set_new_gene_value(g, new_genes_list[g])
+        # only clamp gene by gene if there is a gene out of the range
+        if min(new_genes_list) < LOWER_GENE or max(new_genes_list) > UPPER_GENE:
+            self.__list_of_genes = [max(min(g, UPPER_GENE), LOWER_GENE) for g in new_genes_list]
+        else:
+            self.__list_of_genes = list(new_genes_list)
+        self.__require_update = True
 
-    def randomize_genes(self) -> None:
-        for g in range(self.__num_of_genes):
-            self.set_new_gene_value(g, uniform(LOWER_GENE, UPPER_GENE))
+    def randomize_genes(self, rng: RandomStream = None) -> None:
+        """Draw all the genes at once from rng (by default rng.DEFAULT_STREAM)."""
+        self.__list_of_genes = (rng or DEFAULT_STREAM).uniform_list(self.__num_of_genes, LOWER_GENE, UPPER_GENE)
+        self.__require_update = True
     
     def set_fit_value(self, new_fit_value: float) -> None:
         self.__fit = new_fit_value
         self.__require_update = False
     
 
-def create_list_of_random_individuals(number_of_ind: int, number_of_genes: int, reverse: bool = False) -> List[Individual]:
-    return [Individual(number_of_genes, reverse=reverse) for _ in range(number_of_ind)]
\ No newline at end of file
+class CompactIndividual:
+    """Memory compact version of the Individual, with the same interface. It uses __slots__ and stores the genes in an
+    array('d'), which takes 8 bytes per gene. genes_view returns a read only memoryview of the genes without copying
+    them, and real_genes caches the decoded values until the genes change. Comparisons with Individual are allowed.
+    """
+    __slots__ = ("__genes", "__fit", "__require_update", "__reverse", "__real_genes", "__range_dict")
+
+    def __init__(self, num_of_genes: int, list_of_genes: Sequence[float] = (), reverse: bool = False) -> None:
+        self.__genes = array("d", bytes(8*num_of_genes))
+        self.__fit = DEFAULT_FIT
+        self.__require_update = True
+        self.__reverse = reverse
+        self.__real_genes = None
+        self.__range_dict = None
+        if len(list_of_genes):
+            self.set_all_genes(list_of_genes)
+        else:
+            self.randomize_genes()
+
+    def __str__(self) -> str:
+        return f"(CompactIndividual) fit: {self.fit()}, genes: " + ",".join([str(g) for g in self.__genes])
+
+    def __lt__(self, other: object) -> bool:
+        if not isinstance(other, (Individual, CompactIndividual)):
+            return NotImplemented
+        return self.fit() < other.fit()
+
+    def __le__(self, other: object) -> bool:
+        if not isinstance(other, (Individual, CompactIndividual)):
+            return NotImplemented
+        return self.fit() <= other.fit()
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (Individual, CompactIndividual)):
+            return NotImplemented
+        return self.fit() == other.fit()
+
+    def __ne__(self, other: object) -> bool:
+        if not isinstance(other, (Individual, CompactIndividual)):
+            return NotImplemented
+        return self.fit() != other.fit()
+
+    def __ge__(self, other: object) -> bool:
+        if not isinstance(other, (Individual, CompactIndividual)):
+            return NotImplemented
+        return self.fit() >= other.fit()
+
+    def __gt__(self, other: object) -> bool:
+        if not isinstance(other, (Individual, CompactIndividual)):
+            return NotImplemented
+        return self.fit() > other.fit()
+
+    def require_update(self) -> bool:
+        return self.__require_update
+
+    def fit(self) -> float:
+        if self.__require_update:
+            if self.__reverse:
+                return -DEFAULT_FIT
+            return DEFAULT_FIT
+        return self.__fit
+
+    def get_num_of_genes(self) -> int:
+        return len(self.__genes)
+
+    def gene(self, gene_index: int) -> float:
+        return self.__genes[gene_index]
+
+    def genes(self) -> List[float]:
+        return self.__genes.tolist()
+
+    def genes_view(self) -> memoryview:
+        return memoryview(self.__genes).toreadonly()
+
+    def real_genes(self, range_dict: Dict) -> List[float]:
+        """Return the decoded real genes (same as range.get_real_from_genes), cached until the genes or the
+        range_dict change. The returned list must not be modified."""
+        if self.__real_genes is None or self.__range_dict is not range_dict:
+            self.__real_genes = [range_dict[i].get_real_from_gene(g) for i, g in enumerate(self.__genes)]
+            self.__range_dict = range_dict
+        return self.__real_genes
+
+    def __genes_changed(self) -> None:
+        self.__require_update = True
+        self.__real_genes = None
+
+    def set_new_gene_value(self, gene_index: int, new_value: float) -> None:
+        self.__genes[gene_index] = max(min(new_value, UPPER_GENE), LOWER_GENE)
+        self.__genes_changed()
+
+    def set_all_genes(self, new_genes_list: Sequence[float]) -> None:
+        """The genes are clamped in bulk, gene by gene only if a value is out of the range."""
+        if len(new_genes_list) != len(self.__genes):
+            raise Exception(f"The new gene list has a different amount of parameters. Expected: {len(self.__genes)}, found: {len(new_genes_list)}.")
+        if min(new_genes_list) < LOWER_GENE or max(new_genes_list) > UPPER_GENE:
+            new_genes_list = [max(min(g, UPPER_GENE), LOWER_GENE) for g in new_genes_list]
+        self.__genes[:] = array("d", new_genes_list)
+        self.__genes_changed()
+
+    def randomize_genes(self, rng: RandomStream = None) -> None:
+        self.__genes[:] = array("d", (rng or DEFAULT_STREAM).uniform_list(len(self.__genes), LOWER_GENE, UPPER_GENE))
+        self.__genes_changed()
+
+    def set_fit_value(self, new_fit_value: float) -> None:
+        self.__fit = new_fit_value
+        self.__require_update = False
+
+
+def fit_key(ind: Individual) -> float:
+    """Sort key that calls fit() once per individual, instead of the rich comparisons calling it on every comparison."""
+    return ind.fit()
+
+
+def create_list_of_random_individuals(number_of_ind: int, number_of_genes: int, reverse: bool = False,
+                                      individual_class: type = Individual, rng: RandomStream = None) -> List[Individual]:
+    """The genes of all the individuals are drawn at once from rng (by default rng.DEFAULT_STREAM)."""
+    if number_of_genes == 0:
+        return [individual_class(number_of_genes, reverse=reverse) for _ in range(number_of_ind)]
+    all_genes = (rng or DEFAULT_STREAM).uniform_list(number_of_ind*number_of_genes, LOWER_GENE, UPPER_GENE)
+    return [individual_class(number_of_genes, list_of_genes=all_genes[i*number_of_genes:(i + 1)*number_of_genes], reverse=reverse)
+            for i in range(number_of_ind)]
\ No newline at end of file
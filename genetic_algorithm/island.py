@@ -0,0 +1,187 @@
+from .population import Population
+from .rng import derive_seed
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection
+from typing import Callable, List, Optional, Tuple
+
+
+class Island:
+    """One population of the island model. It keeps the generation counter between the calls of run, so the
+    evolution is split in epochs separated by the migrations. With a seed, the population is seeded with
+    Population.set_seed before the evolution starts."""
+    def __init__(self, population: Population, max_generations: int, target: float = 0.0, seed: Optional[int] = None) -> None:
+        if seed is not None:
+            population.set_seed(seed)
+        self.population = population
+        self.max_generations = max_generations
+        self.target = target
+        self.cur_gen = 0
+        self.done = False
+        self.population.start_evolution()
+
+    def run(self, n_generations: int, migrants: Optional[Tuple[List[List[float]], List[float]]],
+            n_emigrants: int) -> Tuple[List[List[float]], List[float], float, bool]:
+        """Receive the migrants, run n_generations and return (emigrants genes, emigrants fit, best fit, done)."""
+        if migrants and migrants[0]:
+            self.population.replace_worst(*migrants)
+        for _ in range(n_generations):
+            if self.done:
+                break
+            self.cur_gen = self.population.evolve_generation(self.cur_gen + 1, self.max_generations)
+            self.done = self.cur_gen >= self.max_generations or self.population.pop[0].fit() <= self.target
+        emigrants_genes, emigrants_fit = self.population.get_best(n_emigrants)
+        return emigrants_genes, emigrants_fit, self.population.pop[0].fit(), self.done
+
+    def finish(self) -> Tuple[float, List[float], List[float]]:
+        return self.population.finish_evolution()
+
+
+def island_worker(connection: Connection, population_factory: Callable[[int], Population], index: int,
+                  max_generations: int, target: float, seed: Optional[int] = None) -> None:
+    """Main loop of an island process. Receives (command, args) tuples, with the commands run and finish.
+    Any exception is sent back to the IslandModel."""
+    try:
+        island = Island(population_factory(index), max_generations, target, seed)
+        while True:
+            command, args = connection.recv()
+            if command == "run":
+                connection.send(island.run(*args))
+            else:
+                connection.send(island.finish())
+                break
+    except Exception as e:
+        connection.send(e)
+    finally:
+        connection.close()
+
+
+class IslandModel:
+    """Evolve several populations (islands) at once, each one in its own process. Every migration_interval
+    generations, the n_migrants best individuals of each island replace the worst individuals of its neighbours:
+        ring  -> the island i sends its migrants to the island i + 1
+        full  -> each island receives the migrants of all the other islands
+    The islands only synchronize at the migrations, so only the migrants are exchanged between the processes.
+
+    population_factory receives the index of the island and returns its Population, so each island can use its
+    own models. With processes it must be picklable (e.g. a function defined at module level).
+    With use_processes=False the islands run one after the other in the current process.
+
+    With a seed, the island i is seeded with rng.derive_seed(seed, f"island_{i}"), so the evolution is the same
+    with or without processes and can be repeated (as long as the fitness functions are deterministic).
+    """
+    def __init__(self, population_factory: Callable[[int], Population], n_islands: int = 4, migration_interval: int = 50,
+                 n_migrants: int = 2, topology: str = "ring", use_processes: bool = True,
+                 seed: Optional[int] = None) -> None:
+        if topology not in ("ring", "full"):
+            raise Exception(f"Unknown topology: {topology}. Expected 'ring' or 'full'.")
+        self.population_factory = population_factory
+        self.n_islands = n_islands
+        self.migration_interval = migration_interval
+        self.n_migrants = n_migrants
+        self.topology = topology
+        self.use_processes = use_processes
+        self.seed = seed
+        self.results = []
+
+    def get_migrants(self, reports: List[Tuple]) -> List[Tuple[List[List[float]], List[float]]]:
+        """Return the migrants received by each island, given the reports of the last epoch."""
+        if self.topology == "ring":
+            return [reports[i - 1][:2] for i in range(self.n_islands)]
+        all_migrants = []
+        for i in range(self.n_islands):
+            genes, fit = [], []
+            for j in range(self.n_islands):
+                if j != i:
+                    genes.extend(reports[j][0])
+                    fit.extend(reports[j][1])
+            all_migrants.append((genes, fit))
+        return all_migrants
+
+    def get_island_seed(self, index: int) -> Optional[int]:
+        return derive_seed(self.seed, f"island_{index}") if self.seed is not None else None
+
+    def evolve(self, max_generations: int, target: float = 0.0) -> Tuple[float, List[float], List[float]]:
+        """Return the best (fitness_value, real_genes_list, gene_list) among all the islands. The result of each
+        island is available at self.results."""
+        if self.use_processes:
+            islands = [ProcessIsland(self.population_factory, i, max_generations, target, self.get_island_seed(i))
+                       for i in range(self.n_islands)]
+        else:
+            islands = [LocalIsland(Island(self.population_factory(i), max_generations, target, self.get_island_seed(i)))
+                       for i in range(self.n_islands)]
+
+        try:
+            migrants = [None]*self.n_islands
+            while True:
+                for island, island_migrants in zip(islands, migrants):
+                    island.send_run(self.migration_interval, island_migrants, self.n_migrants)
+                reports = [island.receive() for island in islands]
+                if all([r[3] for r in reports]) or min([r[2] for r in reports]) <= target:
+                    break
+                migrants = self.get_migrants(reports)
+
+            for island in islands:
+                island.send_finish()
+            self.results = [island.receive() for island in islands]
+        finally:
+            for island in islands:
+                island.close()
+        return min(self.results, key=lambda result: result[0])
+
+
+class LocalIsland:
+    """Same interface of ProcessIsland, running the island in the current process."""
+    def __init__(self, island: Island) -> None:
+        self.island = island
+        self.result = None
+
+    def send_run(self, *args) -> None:
+        self.result = self.island.run(*args)
+
+    def send_finish(self) -> None:
+        self.result = self.island.finish()
+
+    def receive(self) -> Tuple:
+        return self.result
+
+    def close(self) -> None:
+        pass
+
+
+class ProcessIsland:
+    """Handle of an island running in its own process (see island_worker)."""
+    def __init__(self, population_factory: Callable[[int], Population], index: int, max_generations: int, target: float,
+                 seed: Optional[int] = None) -> None:
+        self.connection, child_connection = Pipe()
+        self.process = Process(target=island_worker, args=(child_connection, population_factory, index, max_generations, target, seed),
+                               daemon=True)
+        self.process.start()
+        child_connection.close()
+
+    def send(self, message: Tuple) -> None:
+        try:
+            self.connection.send(message)
+        except BrokenPipeError:
+            # the worker has stopped, its error is read by receive
+            pass
+
+    def send_run(self, *args) -> None:
+        self.send(("run", args))
+
+    def send_finish(self) -> None:
+        self.send(("finish", ()))
+
+    def receive(self) -> Tuple:
+        try:
+            result = self.connection.recv()
+        except EOFError:
+            raise Exception(f"The island process stopped unexpectedly (exit code {self.process.exitcode}).")
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def close(self) -> None:
+        self.connection.close()
+        self.process.join(timeout=1.0)
+        if self.process.is_alive():
+            self.process.terminate()
@@ -0,0 +1,91 @@
+from .individual import Individual, DEFAULT_FIT, LOWER_GENE, UPPER_GENE
+from .utils import np, generate_random_matrix
+from .rng import RandomStream
+from typing import Iterator
+
+
+class PopulationMatrix:
+    """Store a whole population as a single contiguous (individuals x genes) array plus a fitness vector.
+    Indexing returns (or receives) Individual copies, so the log handlers keep working with the matrix engine.
+    """
+    def __init__(self, genes: "np.ndarray", reverse: bool = False) -> None:
+        if np is None:
+            raise ImportError("The matrix engine requires numpy.")
+        self.genes = np.ascontiguousarray(genes, dtype=np.float64)
+        self.reverse = reverse
+        self.fit_values = np.full(len(self.genes), self.default_fit())
+        self.require_update = np.ones(len(self.genes), dtype=bool)
+
+    @classmethod
+    def random(cls, number_of_ind: int, number_of_genes: int, reverse: bool = False, rng: RandomStream = None) -> "PopulationMatrix":
+        genes = LOWER_GENE + (UPPER_GENE - LOWER_GENE) * generate_random_matrix((number_of_ind, number_of_genes), rng)
+        return cls(genes, reverse=reverse)
+
+    def __len__(self) -> int:
+        return len(self.genes)
+
+    def __iter__(self) -> Iterator[Individual]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, index: int) -> Individual:
+        ind = Individual(self.get_num_of_genes(), list_of_genes=self.genes[index].tolist(), reverse=self.reverse)
+        if not self.require_update[index]:
+            ind.set_fit_value(float(self.fit_values[index]))
+        return ind
+
+    def __setitem__(self, index: int, ind: Individual) -> None:
+        self.genes[index] = ind.genes()
+        if ind.require_update():
+            self.require_update[index] = True
+            self.fit_values[index] = self.default_fit()
+        else:
+            self.set_fit_values(index, ind.fit())
+
+    def default_fit(self) -> float:
+        return -DEFAULT_FIT if self.reverse else DEFAULT_FIT
+
+    def get_num_of_genes(self) -> int:
+        return self.genes.shape[1]
+
+    def set_fit_values(self, index: "np.ndarray", fit_values: "np.ndarray") -> None:
+        self.fit_values[index] = fit_values
+        self.require_update[index] = False
+
+    def randomize_rows(self, index: "np.ndarray", rng: RandomStream = None) -> None:
+        index = np.asarray(index, dtype=np.intp)
+        self.genes[index] = LOWER_GENE + (UPPER_GENE - LOWER_GENE) * generate_random_matrix((len(index), self.get_num_of_genes()), rng)
+        self.require_update[index] = True
+        self.fit_values[index] = self.default_fit()
+
+    def take(self, index: "np.ndarray") -> "PopulationMatrix":
+        new_pop = PopulationMatrix(self.genes[index], reverse=self.reverse)
+        new_pop.fit_values = self.fit_values[index]
+        new_pop.require_update = self.require_update[index]
+        return new_pop
+
+    def concatenate(self, other: "PopulationMatrix") -> "PopulationMatrix":
+        new_pop = PopulationMatrix(np.concatenate((self.genes, other.genes)), reverse=self.reverse)
+        new_pop.fit_values = np.concatenate((self.fit_values, other.fit_values))
+        new_pop.require_update = np.concatenate((self.require_update, other.require_update))
+        return new_pop
+
+    def merge(self, other: "PopulationMatrix", index: "np.ndarray") -> "PopulationMatrix":
+        """Same as self.concatenate(other).take(index), without copying the rows that are not selected."""
+        index = np.asarray(index)
+        from_self = index < len(self)
+        new_pop = PopulationMatrix(np.empty((len(index), self.get_num_of_genes())), reverse=self.reverse)
+        for pop, mask, rows in ((self, from_self, index[from_self]), (other, ~from_self, index[~from_self] - len(self))):
+            new_pop.genes[mask] = pop.genes[rows]
+            new_pop.fit_values[mask] = pop.fit_values[rows]
+            new_pop.require_update[mask] = pop.require_update[rows]
+        return new_pop
+
+    def sort(self) -> None:
+        """The rows are only copied if the population is not already sorted."""
+        if (self.fit_values[1:] >= self.fit_values[:-1]).all():
+            return
+        order = np.argsort(self.fit_values, kind="stable")
+        self.genes = self.genes[order]
+        self.fit_values = self.fit_values[order]
+        self.require_update = self.require_update[order]
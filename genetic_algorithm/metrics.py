@@ -0,0 +1,105 @@
+from .save_load_print import average_fit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+import math
+import threading
+import time
+
+
+class MetricsExporter:
+    """Serve the metrics of a running evolution in the Prometheus text format at http://<host>:<port>/metrics, from a
+    background thread. It is a generation callback:
+        exporter = MetricsExporter(port=9100)
+        my_pop.add_generation_callback(exporter)
+    The metrics are updated at most every update_interval seconds, in a new dict that replaces the previous one, so a
+    scrape only reads the last snapshot and never waits for (or blocks) the evolution. With port=0 a free port is
+    chosen, it is available at self.address.
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, update_interval: float = 1.0, prefix: str = "ga") -> None:
+        self.update_interval = update_interval
+        self.prefix = prefix
+        self.snapshot = {}
+        self.last_update = None
+
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.address = self.server.server_address[:2]
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.1}, daemon=True)
+        self.thread.start()
+
+    def __call__(self, population: "Population", stats: Dict) -> None:
+        now = time.monotonic()
+        if self.last_update is not None and now - self.last_update[0] < self.update_interval:
+            return
+        snapshot = {"generation": stats["generation"],
+                    "evaluations_total": stats["evaluations"]["total"],
+                    "best_fitness": stats["best_fit"],
+                    "mean_fitness": average_fit(population.pop),
+                    "stage_seconds_total": stats["timers"]["total"]}
+        cache = population.get_cache()
+        if cache is not None:
+            snapshot["cache_hit_rate"] = cache.hit_rate()
+        if self.last_update is not None and now > self.last_update[0]:
+            last_time, last_generation, last_evaluations = self.last_update
+            snapshot["generations_per_second"] = (stats["generation"] - last_generation) / (now - last_time)
+            snapshot["evaluations_per_second"] = (stats["evaluations"]["total"] - last_evaluations) / (now - last_time)
+        self.last_update = (now, stats["generation"], stats["evaluations"]["total"])
+        self.snapshot = snapshot
+
+    def render(self) -> str:
+        """Return the last snapshot in the Prometheus text format."""
+        snapshot = self.snapshot
+        lines = []
+        metrics = [("generation", "gauge", "Current generation."),
+                   ("generations_per_second", "gauge", "Generations per second since the previous update."),
+                   ("evaluations_total", "counter", "Fitness evaluations since the start of the evolution."),
+                   ("evaluations_per_second", "gauge", "Fitness evaluations per second since the previous update."),
+                   ("best_fitness", "gauge", "Fitness of the best individual."),
+                   ("mean_fitness", "gauge", "Mean fitness of the population."),
+                   ("cache_hit_rate", "gauge", "Hit rate of the fitness cache.")]
+        for name, metric_type, description in metrics:
+            if name in snapshot:
+                lines.extend(self.format_metric(name, metric_type, description, [("", snapshot[name])]))
+        if "stage_seconds_total" in snapshot:
+            samples = [(f'{{stage="{stage}"}}', seconds) for stage, seconds in snapshot["stage_seconds_total"].items()]
+            lines.extend(self.format_metric("stage_seconds_total", "counter", "Wall time of each stage of the generations.", samples))
+        return "\n".join(lines) + "\n"
+
+    def format_metric(self, name: str, metric_type: str, description: str, samples: List[Tuple[str, float]]) -> List[str]:
+        name = f"{self.prefix}_{name}"
+        lines = [f"# HELP {name} {description}", f"# TYPE {name} {metric_type}"]
+        for labels, value in samples:
+            value = float(value)
+            if math.isnan(value):
+                value = "NaN"
+            elif math.isinf(value):
+                value = "+Inf" if value > 0 else "-Inf"
+            lines.append(f"{name}{labels} {value}")
+        return lines
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "MetricsExporter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
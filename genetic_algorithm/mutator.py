@@ -1,11 +1,22 @@
 from abc import ABC, abstractmethod
-from .individual import Individual, UPPER_GENE
-import random  
-from typing import Callable, List
-from .utils import generate_random_number
+from .individual import Individual, LOWER_GENE, UPPER_GENE
+from typing import Callable, List, Tuple
+from .utils import np, generate_random_number, generate_random_matrix, sample_sparse_indexes, sample_sparse_indexes_matrix
+from .rng import DEFAULT_STREAM, RandomStream
+
+
+def all_random_kernel(genes: "np.ndarray", gen_mut_chance: float, mut_range: float, rng: RandomStream = None) -> "np.ndarray":
+    """Apply the AllRandom perturbation to all the rows of a genes matrix at once, clamping in bulk."""
+    gene_mask = generate_random_matrix(genes.shape, rng) <= gen_mut_chance
+    genes = genes + gene_mask * (mut_range * UPPER_GENE) * (generate_random_matrix(genes.shape, rng) - UPPER_GENE / 2)
+    return np.clip(genes, LOWER_GENE, UPPER_GENE, out=genes)
+
 
 class BaseMutator(ABC):
     """Framework to model mutators handlers"""
+    # source of the random numbers, replaced by the "mutator" stream of a seeded Population
+    rng = DEFAULT_STREAM
+
     @abstractmethod
     def mutate_individual(self, individual: Individual) -> None:
         raise NotImplementedError
@@ -14,6 +25,10 @@ class BaseMutator(ABC):
     def mutate_all_individuals(self, list_individuals: List[Individual]) -> None:
         raise NotImplementedError
 
+    def mutate_all_matrix(self, genes: "np.ndarray") -> "np.ndarray":
+        """Matrix engine version. Mutate the genes matrix in place and return the indexes of the mutated rows."""
+        raise NotImplementedError(f"{type(self).__name__} does not support the matrix engine.")
+
 
 class AllRandom(BaseMutator):
     def __init__(self, ind_mut_chance: float = 0.05, gen_mut_chance: float = 0.1, mut_range: float = 0.1, random_generation_fun: Callable = generate_random_number) -> None:
@@ -24,13 +39,73 @@ class AllRandom(BaseMutator):
     
 
     def mutate_individual(self, individual: Individual) -> None:
-        if self.random_fun() <= self.ind_mut_chance:
+        """With the default random_generation_fun, the numbers are drawn from self.rng."""
+        random_fun = self.rng.number if self.random_fun is generate_random_number else self.random_fun
+        if random_fun() <= self.ind_mut_chance:
             new_genes = individual.genes()
             for i in range(len(new_genes)):
-                if self.random_fun() <= self.gen_mut_chance:
-                    new_genes[i] = new_genes[i] + (self.mut_range * UPPER_GENE) * (self.random_fun() - UPPER_GENE / 2)
+                if random_fun() <= self.gen_mut_chance:
+                    new_genes[i] = new_genes[i] + (self.mut_range * UPPER_GENE) * (random_fun() - UPPER_GENE / 2)
             individual.set_all_genes(new_genes)
 
     def mutate_all_individuals(self, list_individuals: List[Individual]) -> None:
-        for ind in list_individuals:
-            self.mutate_individual(ind)
+        """With numpy and the default random_generation_fun, the individuals are mutated in batch: the individual
+        mask is drawn at once, and only the selected individuals go through all_random_kernel."""
+        if np is None or self.random_fun is not generate_random_number:
+            for ind in list_individuals:
+                self.mutate_individual(ind)
+            return
+        rows = np.flatnonzero(self.rng.matrix(len(list_individuals)) <= self.ind_mut_chance).tolist()
+        if rows:
+            new_genes = all_random_kernel(np.array([list_individuals[i].genes_view() for i in rows]), self.gen_mut_chance,
+                                          self.mut_range, self.rng)
+            for i, genes in zip(rows, new_genes.tolist()):
+                list_individuals[i].set_all_genes(genes)
+
+    def mutate_all_matrix(self, genes: "np.ndarray") -> "np.ndarray":
+        """The random_generation_fun is not used here, the matrix engine draws all the numbers at once."""
+        rows = np.flatnonzero(self.rng.matrix(len(genes)) <= self.ind_mut_chance)
+        genes[rows] = all_random_kernel(genes[rows], self.gen_mut_chance, self.mut_range, self.rng)
+        return rows
+
+
+class SparseRandom(BaseMutator):
+    """Same model of AllRandom, for genomes with a large number of genes. Instead of drawing one number per gene,
+    the mutated individuals and genes are sampled with utils.sample_sparse_indexes, so the expected work scales with
+    the number of mutated genes. The changes of the last call are kept in last_changes, as a list of
+    (individual index, list of gene indexes), or a tuple of (rows, columns) arrays for the matrix engine.
+    """
+    def __init__(self, ind_mut_chance: float = 0.05, gen_mut_chance: float = 0.1, mut_range: float = 0.1) -> None:
+        self.ind_mut_chance = ind_mut_chance
+        self.gen_mut_chance = gen_mut_chance
+        self.mut_range = mut_range
+        self.last_changes = []
+
+    def mutate_genes(self, individual: Individual) -> List[int]:
+        changed = sample_sparse_indexes(individual.get_num_of_genes(), self.gen_mut_chance, self.rng)
+        for i, u in zip(changed, self.rng.numbers(len(changed))):
+            individual.set_new_gene_value(i, individual.gene(i) + (self.mut_range * UPPER_GENE) * (u - UPPER_GENE / 2))
+        return changed
+
+    def mutate_individual(self, individual: Individual) -> List[int]:
+        """Return the indexes of the mutated genes."""
+        if self.rng.number() <= self.ind_mut_chance:
+            return self.mutate_genes(individual)
+        return []
+
+    def mutate_all_individuals(self, list_individuals: List[Individual]) -> None:
+        self.last_changes = []
+        for i in sample_sparse_indexes(len(list_individuals), self.ind_mut_chance, self.rng):
+            changed = self.mutate_genes(list_individuals[i])
+            if changed:
+                self.last_changes.append((i, changed))
+
+    def mutate_all_matrix(self, genes: "np.ndarray") -> "np.ndarray":
+        rows = sample_sparse_indexes_matrix(len(genes), self.ind_mut_chance, self.rng)
+        n_genes = genes.shape[1]
+        positions = sample_sparse_indexes_matrix(len(rows)*n_genes, self.gen_mut_chance, self.rng)
+        changed_rows, changed_cols = rows[positions // n_genes], positions % n_genes
+        new_values = genes[changed_rows, changed_cols] + (self.mut_range * UPPER_GENE) * (self.rng.matrix(len(positions)) - UPPER_GENE / 2)
+        genes[changed_rows, changed_cols] = np.clip(new_values, LOWER_GENE, UPPER_GENE)
+        self.last_changes = (changed_rows, changed_cols)
+        return rows
@@ -1,23 +1,39 @@
 from abc import ABC, abstractmethod
 from .individual import Individual
-from .utils import k_tournament
+from .utils import fast_k_tournament, k_tournament_matrix
+from .rng import DEFAULT_STREAM
 from typing import List, Tuple
 
 
 class BaseParentsSelector(ABC):
+    # source of the random numbers, replaced by the "parent_selector" stream of a seeded Population
+    rng = DEFAULT_STREAM
+
     @abstractmethod
     def select_all_parents(self, parents: List[Individual]) -> List[Tuple[int, int]]:
         raise NotImplementedError
 
+    def select_all_parents_matrix(self, fit_values: "np.ndarray") -> "np.ndarray":
+        """Matrix engine version. Receives the fitness vector and returns a (n_pairs x 2) array of indexes."""
+        raise NotImplementedError(f"{type(self).__name__} does not support the matrix engine.")
+
 class KTournamentParentSelector(BaseParentsSelector):
-    def __init__(self, k: int = 2, parents_ratio: float = 1.0) -> None:
+    """Select each parent with a tournament among k candidates, see utils.fast_k_tournament. By default the
+    candidates are drawn without replacement."""
+    def __init__(self, k: int = 2, parents_ratio: float = 1.0, replacement: bool = False) -> None:
         self.k = k
         self.parents_ratio = parents_ratio
+        self.replacement = replacement
 
     def select_all_parents(self, parents: List[Individual]) -> List[Tuple[int, int]]:
-        all_parents = k_tournament(self.k, 2*round(self.parents_ratio * len(parents)), parents)
+        fit_values = [ind.fit() for ind in parents]
+        all_parents = fast_k_tournament(self.k, 2*round(self.parents_ratio * len(parents)), fit_values, self.replacement, self.rng)
         parents_pair = []
         for i in range(0, len(all_parents), 2):
             if all_parents[i] != all_parents[i+1]:
                 parents_pair.append((all_parents[i] , all_parents[i+1]))
-        return parents_pair
\ No newline at end of file
+        return parents_pair
+
+    def select_all_parents_matrix(self, fit_values: "np.ndarray") -> "np.ndarray":
+        all_parents = k_tournament_matrix(self.k, 2*round(self.parents_ratio * len(fit_values)), fit_values, self.replacement, self.rng).reshape(-1, 2)
+        return all_parents[all_parents[:, 0] != all_parents[:, 1]]
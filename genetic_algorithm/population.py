@@ -1,21 +1,53 @@
-from .individual import Individual, create_list_of_random_individuals
-from .range import BaseRange, LinearRange, get_real_from_genes ,create_range_from_str
+from .individual import Individual, create_list_of_random_individuals, fit_key
+from .range import BaseRange, LinearRange, get_real_from_genes, create_range_from_str, RangeDecoder
 from .parent_selector import BaseParentsSelector, KTournamentParentSelector
-from .population_selector import BasePopulationSelector, BestIndividualSelector
+from .population_selector import BasePopulationSelector, BestIndividualSelector, PartialBestIndividualSelector
 from .crossover import BaseCrossover, RandomCrossover
 from .mutator import BaseMutator, AllRandom
-from .stall import BaseStallControl, GenerationStallControl
+from .stall import BaseStallControl, GenerationStallControl, worst_indexes, worst_rows
 from .save_load_print import DefaultLog
+from .matrix import PopulationMatrix
+from .evaluator import BaseEvaluator, SerialEvaluator
+from .cache import BaseFitnessCache
+from .checkpoint import save_checkpoint, load_checkpoint
+from .rng import RandomStreams
+from .utils import np, get_random_state, set_random_state
 from math import inf
-from typing import Callable, List, Dict, Tuple
+from typing import Callable, List, Dict, Optional, Tuple
+import os
+import time
 
 
 class Population:
-    def __init__(self, num_of_genes: int, num_of_individuals: int, fitness_fun: Callable[[List[float]], float], reverse: bool = False) -> None:
+    # stages of a generation measured in self.timers
+    STAGES = ("select_parents", "crossover", "mutate", "evaluate", "select_next_pop", "log", "stall_control", "checkpoint")
+
+    def __init__(self, num_of_genes: int, num_of_individuals: int, fitness_fun: Callable[[List[float]], float], reverse: bool = False,
+                 engine: str = "individual", batch_fitness: bool = False, individual_class: type = Individual,
+                 seed: Optional[int] = None) -> None:
+        """engine:
+        individual -> each member of the population is an Individual object (default)
+        matrix     -> the population is stored as a single numpy (individuals x genes) array, see matrix.PopulationMatrix
+
+        batch_fitness: if True, the fitness_fun receives a 2-D numpy array with the real genes of several
+        individuals (one per row) and must return a 1-D array with their fitness values.
+
+        individual_class: class of the members of the population for the individual engine, e.g. individual.CompactIndividual
+
+        seed: seed of the random streams of the population, see set_seed. Without a seed, all the components draw from
+        the random module and the numpy generator shared by the process (rng.DEFAULT_STREAM).
+        """
+        if engine not in ("individual", "matrix"):
+            raise Exception(f"Unknown engine: {engine}. Expected 'individual' or 'matrix'.")
+        if batch_fitness and np is None:
+            raise ImportError("The batch_fitness mode requires numpy.")
         self.num_of_genes = num_of_genes
         self.num_individuals = num_of_individuals
         self.reverse = reverse
         self.fitness_fun = fitness_fun
+        self.engine = engine
+        self.batch_fitness = batch_fitness
+        self.individual_class = individual_class
         
         self.__range = {i:LinearRange(0.0, 1.0) for i in range(self.num_of_genes)}
         self.__parent_selector = KTournamentParentSelector()
@@ -24,23 +56,89 @@ class Population:
         self.__pop_selector = BestIndividualSelector()
         self.__stall = GenerationStallControl()
         self.__log = DefaultLog()
+        self.__evaluator = SerialEvaluator()
+        self.__cache = None
+        self.__decoder = None
         self.log = {"print": True,
                     "gen_freq": 100,
                     "time_freq": 15,
                     "last_best": inf}
-        self.pop = create_list_of_random_individuals( self.num_individuals, self.num_of_genes, reverse=self.reverse)
+        self.evaluations = {"total": 0,
+                            "last_generation": 0}
+        self.checkpoint = {"path": None,
+                           "gen_freq": 100,
+                           "last_time": 0.0}
+        self.timers = {"total": dict.fromkeys(self.STAGES, 0.0),
+                       "last_generation": dict.fromkeys(self.STAGES, 0.0)}
+        self.callbacks = []
+        self.stop_reason = None
+        self.streams = None
+        if seed is not None:
+            self.set_seed(seed)
+        else:
+            self.pop = self.create_random_pop()
+
+    def create_random_pop(self) -> List[Individual]:
+        rng = self.streams.stream("population") if self.streams is not None else None
+        if self.engine == "matrix":
+            return PopulationMatrix.random(self.num_individuals, self.num_of_genes, reverse=self.reverse, rng=rng)
+        return create_list_of_random_individuals(self.num_individuals, self.num_of_genes, reverse=self.reverse,
+                                                 individual_class=self.individual_class, rng=rng)
+
+    def set_seed(self, seed: int) -> None:
+        """Create the random streams of seed (see rng.RandomStreams) and draw a new initial population. The parent
+        selector, crossover, mutator, stall control and log (also the ones set later by set_models) and the initial
+        population draw from their own independent stream, so two populations with the same seed and models evolve
+        in the same way."""
+        self.streams = RandomStreams(seed)
+        self.assign_streams()
+        self.pop = self.create_random_pop()
+
+    def assign_streams(self) -> None:
+        if self.streams is None:
+            return
+        for name, model in (("parent_selector", self.__parent_selector), ("crossover", self.__crossover),
+                            ("mutator", self.__mutator), ("stall", self.__stall), ("log", self.__log)):
+            model.rng = self.streams.stream(name)
 
     def set_log_file(self, log_file: str) -> None:
         self.log["log_path"] = log_file
         if self.log["log_path"][-4:] != ".txt":
             self.log["log_path"] += ".txt"
 
+    def set_checkpoint_file(self, checkpoint_file: str, gen_freq: int = 100) -> None:
+        """Save the whole population to checkpoint_file every gen_freq generations, see evolve(resume=True).
+        The time spent by the last save (in seconds) is available at self.checkpoint["last_time"]."""
+        self.checkpoint["path"] = checkpoint_file
+        self.checkpoint["gen_freq"] = gen_freq
+
+    def add_generation_callback(self, callback: Callable[["Population", Dict], None]) -> None:
+        """The callback is called after each generation with the population and the dict of get_generation_stats."""
+        self.callbacks.append(callback)
+
+    def get_generation_stats(self, cur_gen: int) -> Dict:
+        """Return the generation, the best fitness, the evaluation counters and the wall time (in seconds) of each stage,
+        for the last generation and accumulated since the start of the evolution."""
+        return {"generation": cur_gen,
+                "best_fit": self.pop[0].fit(),
+                "evaluations": dict(self.evaluations),
+                "timers": {"total": dict(self.timers["total"]),
+                           "last_generation": dict(self.timers["last_generation"])}}
+
+    def record_time(self, stage: str, start: float) -> float:
+        """Add the time since start to the stage and return the current time, which is the start of the next stage."""
+        now = time.perf_counter()
+        self.timers["last_generation"][stage] += now - start
+        return now
+
     def set_models(self, parent_selector: BaseParentsSelector = None,
                         crossover: BaseCrossover = None,
                         mutator: BaseMutator = None,
                         pop_selector: BasePopulationSelector = None,
                         stall: BaseStallControl = None,
-                        log: DefaultLog = None
+                        log: DefaultLog = None,
+                        evaluator: BaseEvaluator = None,
+                        cache: BaseFitnessCache = None
                     ) -> None:
         if parent_selector:
             self.__parent_selector = parent_selector
@@ -54,10 +152,17 @@ class Population:
             self.__stall = stall
         if log:
             self.__log = log
+        if evaluator:
+            self.__evaluator = evaluator
+        if cache is not None:
+            self.__cache = cache
+        self.assign_streams()
 
     def set_range_from_dict(self, new_range: Dict[int, BaseRange]) -> None:
         """ gen_index:BaseRange """
-        self.__range.update(new_range)
+        # a new dict, so the real genes cached by the individuals (see CompactIndividual.real_genes) are decoded again
+        self.__range = {**self.__range, **new_range}
+        self.__decoder = None
     
     def set_range_from_str(self, new_range: str) -> None:
         """ str_pattern:
@@ -68,6 +173,9 @@ class Population:
     
     def get_range_dict(self) -> Dict[int, BaseRange]:
         return self.__range
+
+    def get_cache(self) -> BaseFitnessCache:
+        return self.__cache
     
     def init_log(self) -> None:
         self.pop[0] = self.__log.init_log(self.pop, self.log, self.__range)
@@ -81,53 +189,256 @@ class Population:
     def load_from_log(self) -> None:
         self.pop[0] = self.__log.load_from_log()
     
+    def get_decoder(self) -> RangeDecoder:
+        """Return the range dict compiled into a RangeDecoder (None without numpy). It is compiled again after
+        set_range_from_dict, so call it again if a range object is changed in place."""
+        if self.__decoder is None and np is not None:
+            self.__decoder = RangeDecoder(self.__range, self.num_of_genes)
+        return self.__decoder
+
     def get_genes_from_real(self, list_of_real: List[float]) -> List[float]:
+        if self.get_decoder() is not None:
+            return self.get_decoder().encode([list_of_real])[0].tolist()
         return [self.__range[i].get_gene_from_real(real) for i, real in enumerate(list_of_real)]
 
+    def evaluate_real_genes(self, all_real_genes: List[List[float]]) -> List[float]:
+        """Return the fitness of each list of real genes. In batch mode the fitness_fun is called only once."""
+        if len(all_real_genes) == 0:
+            return []
+        self.evaluations["total"] += len(all_real_genes)
+        return self.__evaluator.evaluate_all(self.fitness_fun, all_real_genes, self.batch_fitness)
+
+    def decode_genes(self, all_genes: List[List[float]]) -> List[List[float]]:
+        """Convert a list of genes (or a genes matrix) to the real genes in the format expected by the fitness_fun.
+        With numpy, all the genes are decoded at once by the compiled RangeDecoder."""
+        if self.get_decoder() is None:
+            return [get_real_from_genes(genes, self.__range) for genes in all_genes]
+        all_real_genes = self.get_decoder().decode(all_genes)
+        return all_real_genes if self.batch_fitness else all_real_genes.tolist()
+
+    def evaluate_genes(self, all_genes: List[List[float]]) -> List[float]:
+        """Return the fitness of each list of genes (or row of a genes matrix). If a fitness cache is set,
+        only the genes not found in the cache are evaluated, once per cache key (e.g. identical children)."""
+        if self.__cache is None:
+            return self.evaluate_real_genes(self.decode_genes(all_genes))
+        list_of_genes = all_genes if isinstance(all_genes, list) else all_genes.tolist()
+        all_fit = self.__cache.get_many(list_of_genes)
+        missing_keys = {i: self.__cache.key(list_of_genes[i]) for i, fit in enumerate(all_fit) if fit is None}
+        first_of_key = {}
+        for i, key in missing_keys.items():
+            first_of_key.setdefault(key, i)
+        unique = list(first_of_key.values())
+        missing_genes = [all_genes[i] for i in unique] if isinstance(all_genes, list) else all_genes[unique]
+        new_fit = self.evaluate_real_genes(self.decode_genes(missing_genes))
+        fit_by_key = {missing_keys[i]: fit for i, fit in zip(unique, new_fit)}
+        for i, key in missing_keys.items():
+            all_fit[i] = fit_by_key[key]
+        self.__cache.put_many([list_of_genes[i] for i in unique], new_fit)
+        return all_fit
+
     def calculate_fitness(self, ind: Individual) -> None:
-        fit = self.fitness_fun(get_real_from_genes(ind.genes(), self.__range))
-        ind.set_fit_value(fit)
+        ind.set_fit_value(self.evaluate_genes([ind.genes()])[0])
+
+    def calculate_all_fitness(self, pop: List[Individual], sort: bool = True) -> int:
+        """Only the individuals that require an update are evaluated, return their number. Use sort=False when the
+        order of the population is not needed (e.g. the children, which are ordered by the population selector)."""
+        if isinstance(pop, PopulationMatrix):
+            return self.calculate_all_fitness_matrix(pop, sort)
+        to_update = [ind for ind in pop if ind.require_update()]
+        if self.__cache is None and not self.batch_fitness and hasattr(self.individual_class, "real_genes"):
+            # the individuals keep the decoded genes, which the log and finish_evolution reuse
+            all_fit = self.evaluate_real_genes([ind.real_genes(self.__range) for ind in to_update])
+        else:
+            all_fit = self.evaluate_genes([ind.genes_view() for ind in to_update])
+        for ind, fit in zip(to_update, all_fit):
+            ind.set_fit_value(fit)
+        if sort:
+            pop.sort(key=fit_key)
+        return len(to_update)
+
+    def calculate_all_fitness_matrix(self, pop: PopulationMatrix, sort: bool = True) -> int:
+        to_update = pop.require_update.nonzero()[0]
+        pop.set_fit_values(to_update, self.evaluate_genes(pop.genes[to_update]))
+        if sort:
+            pop.sort()
+        return len(to_update)
 
-    def calculate_all_fitness(self, pop: List[Individual]) -> None:
-        for ind in pop:
-            self.calculate_fitness(ind)
-        pop.sort()
+    def move_best_first(self) -> None:
+        """Move the best individual to the first position, keeping the order of the others."""
+        if self.engine == "matrix":
+            best = int(np.argmin(self.pop.fit_values))
+            if best:
+                self.pop = self.pop.take(np.r_[best, 0:best, best + 1:len(self.pop)])
+            return
+        best = min(range(len(self.pop)), key=lambda i: self.pop[i].fit())
+        if best:
+            self.pop.insert(0, self.pop.pop(best))
 
     def select_parents_pairs(self) -> List[Tuple[int, int]]:
+        if self.engine == "matrix":
+            return self.__parent_selector.select_all_parents_matrix(self.pop.fit_values)
         return self.__parent_selector.select_all_parents(self.pop)
 
     def crossover(self, parents_pair: List[Tuple[int, int]]) -> List[Individual]:
+        if self.engine == "matrix":
+            return PopulationMatrix(self.__crossover.generate_all_offspring_matrix(self.pop.genes, parents_pair), reverse=self.reverse)
         return self.__crossover.generate_all_offspring(self.pop, parents_pair)
 
     def mutate(self, pop: List[Individual]) -> None:
+        if isinstance(pop, PopulationMatrix):
+            self.__mutator.mutate_all_matrix(pop.genes)
+            return
         self.__mutator.mutate_all_individuals(pop)
     
     def select_next_pop(self, children_pop: List[Individual]) -> None:
+        if self.engine == "matrix":
+            selected = self.__pop_selector.select_population_matrix(self.num_individuals, self.pop.fit_values, children_pop.fit_values)
+            self.pop = self.pop.merge(children_pop, selected)
+            return
         self.pop = self.__pop_selector.select_population(self.num_individuals, self.pop, children_pop)
     
     def stall_control(self, cur_gen: int, max_generation: int) -> int:
+        if self.engine == "matrix":
+            return self.__stall.stall_matrix(cur_gen, max_generation, self.pop)
         return self.__stall.stall_pop(cur_gen, max_generation, self.pop)
 
-    def evolve(self, max_generations: int, target: float = 0.0) -> Tuple[float, List[float], List[float]]:
-        """Return a tuple containing (fitness_value, real_genes_list, gene_list)"""
-        cur_gen = 0
+    def get_best(self, n_individuals: int) -> Tuple[List[List[float]], List[float]]:
+        """Return the genes and the fitness values of the n best individuals, from the best one. They are found with a
+        partial selection, as the population is not sorted after the stall control or an unsorted population selector."""
+        fit_values = self.pop.fit_values if self.engine == "matrix" else [ind.fit() for ind in self.pop]
+        best = [self.pop[i] for i in PartialBestIndividualSelector().select_indexes(n_individuals, fit_values)]
+        return [ind.genes() for ind in best], [ind.fit() for ind in best]
+
+    def replace_worst(self, all_genes: List[List[float]], all_fit: List[float]) -> None:
+        """Replace the worst individuals by already evaluated ones (e.g. the migrants of the island model). The best
+        individual is never replaced."""
+        individual_class = Individual if self.engine == "matrix" else type(self.pop[0])
+        n_replaced = min(len(all_genes), len(self.pop) - 1)
+        worst = worst_rows(self.pop, n_replaced).tolist() if self.engine == "matrix" else worst_indexes(self.pop, n_replaced)
+        for i, genes, fit in zip(worst, all_genes, all_fit):
+            ind = individual_class(self.num_of_genes, list_of_genes=genes, reverse=self.reverse)
+            ind.set_fit_value(fit)
+            self.pop[i] = ind
+        self.move_best_first()
+
+    def save_checkpoint(self, cur_gen: int) -> None:
+        start = time.perf_counter()
+        state = {"random": get_random_state(),
+                 "streams": self.streams.get_state() if self.streams is not None else None,
+                 "stall": self.__stall.get_state(),
+                 "log": self.__log.get_state(),
+                 "evaluations": self.evaluations,
+                 # the checkpoint is saved during the generation, so its times are added
+                 "timers": {stage: self.timers["total"][stage] + self.timers["last_generation"][stage] for stage in self.STAGES}}
+        save_checkpoint(self.checkpoint["path"], self.pop, cur_gen, state)
+        self.checkpoint["last_time"] = time.perf_counter() - start
+
+    def load_checkpoint(self) -> int:
+        """Restore the population, the random states, the stall control, the log state, the evaluations counters and
+        the total timers from the checkpoint file. Return the generation of the checkpoint."""
+        self.pop, cur_gen, state = load_checkpoint(self.checkpoint["path"], self.engine, self.reverse, self.individual_class)
+        set_random_state(state["random"])
+        if self.streams is not None and state.get("streams") is not None:
+            self.streams.set_state(state["streams"])
+        self.__stall.set_state(state["stall"])
+        self.__log.set_state(state.get("log", {}))
+        self.evaluations.update(state["evaluations"])
+        self.timers["total"] = dict.fromkeys(self.STAGES, 0.0)
+        self.timers["total"].update(state.get("timers", {}))
+        return cur_gen
+
+    def start_evolution(self, resume: bool = False) -> int:
+        """First step of evolve: initialize the log and evaluate the initial population. With resume and an
+        existing checkpoint file, the evolution continues from the checkpoint instead. Return the current generation."""
+        if resume and self.checkpoint["path"] and os.path.exists(self.checkpoint["path"]):
+            cur_gen = self.load_checkpoint()
+            # start the log without replacing the first individual by the one saved in the log file
+            self.__log.init_log(self.pop, self.log, self.__range)
+            return cur_gen
+        self.evaluations["total"] = 0
+        self.timers["total"] = dict.fromkeys(self.STAGES, 0.0)
         self.init_log()
         self.calculate_all_fitness(self.pop)
+        return 0
+
+    def evolve_generation(self, cur_gen: int, max_generations: int) -> int:
+        """Run the generation cur_gen and return the generation number, which can be changed by the stall control."""
+        evaluations_before = self.evaluations["total"]
+        self.timers["last_generation"] = dict.fromkeys(self.STAGES, 0.0)
+        start = time.perf_counter()
+
+        parents_pair = self.select_parents_pairs()
+        start = self.record_time("select_parents", start)
+        children_pop = self.crossover(parents_pair)
+        start = self.record_time("crossover", start)
+        self.mutate(children_pop)
+        start = self.record_time("mutate", start)
+        self.calculate_all_fitness(children_pop, sort=False)
+        start = self.record_time("evaluate", start)
+        self.select_next_pop(children_pop)
+        start = self.record_time("select_next_pop", start)
+        self.update_log(cur_gen, max_generations)
+        start = self.record_time("log", start)
+        cur_gen = self.stall_control(cur_gen, max_generations)
+        start = self.record_time("stall_control", start)
+        # evaluate the individuals modified by the stall control, the others keep the order of the population selector
+        if self.calculate_all_fitness(self.pop, sort=False):
+            self.move_best_first()
+        start = self.record_time("evaluate", start)
+        self.evaluations["last_generation"] = self.evaluations["total"] - evaluations_before
+        if self.checkpoint["path"] and cur_gen % self.checkpoint["gen_freq"] == 0:
+            self.save_checkpoint(cur_gen)
+            self.record_time("checkpoint", start)
 
-        while cur_gen < max_generations:
-            cur_gen += 1
+        for stage, elapsed in self.timers["last_generation"].items():
+            self.timers["total"][stage] += elapsed
+        if self.callbacks:
+            stats = self.get_generation_stats(cur_gen)
+            for callback in self.callbacks:
+                callback(self, stats)
+        return cur_gen
 
-            children_pop = self.crossover(self.select_parents_pairs())
-            self.mutate(children_pop)
-            self.calculate_all_fitness(children_pop)
-            self.select_next_pop(children_pop)
-            self.update_log(cur_gen, max_generations)
-            cur_gen = self.stall_control(cur_gen, max_generations)
-            # to ensure all individulas have been evaluated
-            self.calculate_all_fitness(self.pop)
+    def get_stop_reason(self, target: float) -> str:
+        if self.pop[0].fit() <= target:
+            return "target reached"
+        if self.__stall.stop_reason is not None:
+            return f"stall control: {self.__stall.stop_reason}"
+        return "max generations reached"
 
-            if self.pop[0].fit() <= target:
-                return (self.pop[0].fit(), get_real_from_genes(self.pop[0].genes(), self.__range), self.pop[0].genes())
+    def finish_evolution(self) -> Tuple[float, List[float], List[float]]:
+        """Last step of evolve: flush the log and the cache and return the best individual."""
+        self.__log.flush()
+        if self.__cache is not None:
+            self.__cache.flush()
+        best_genes = self.pop[0].genes()
+        if hasattr(self.pop[0], "real_genes"):
+            return (self.pop[0].fit(), list(self.pop[0].real_genes(self.__range)), best_genes)
+        return (self.pop[0].fit(), get_real_from_genes(best_genes, self.__range), best_genes)
 
-        return (self.pop[0].fit(), get_real_from_genes(self.pop[0].genes(), self.__range), self.pop[0].genes())
+    def evolve(self, max_generations: int, target: float = 0.0, resume: bool = False) -> Tuple[float, List[float], List[float]]:
+        """Return a tuple containing (fitness_value, real_genes_list, gene_list).
+        The number of fitness evaluations is available at self.evaluations (total and last_generation).
+        With resume, the evolution continues from the checkpoint file (see set_checkpoint_file), if it exists.
+        The steps are also available as start_evolution, evolve_generation and finish_evolution, to run the
+        evolution in parts (see island.IslandModel). The reason of the end is available at self.stop_reason."""
+        try:
+            cur_gen = self.start_evolution(resume)
+            while cur_gen < max_generations:
+                cur_gen = self.evolve_generation(cur_gen + 1, max_generations)
+                if self.pop[0].fit() <= target:
+                    break
+            self.stop_reason = self.get_stop_reason(target)
+        except BaseException:
+            # keep the records and the evaluations of the failed run, without hiding its exception
+            try:
+                self.__log.flush()
+            except Exception:
+                pass
+            if self.__cache is not None:
+                try:
+                    self.__cache.flush()
+                except Exception:
+                    pass
+            raise
 
+        return self.finish_evolution()
@@ -1,15 +1,65 @@
 from abc import ABC, abstractmethod
-from .individual import Individual
+from .individual import Individual, fit_key
+from .utils import np
 from typing import List
+import heapq
 
 class BasePopulationSelector(ABC):
     @abstractmethod
     def select_population(self, new_pop_size: int, pop_1: List[Individual], pop_2: List[Individual]) -> List[Individual]:
         raise NotImplementedError
 
+    def select_population_matrix(self, new_pop_size: int, fit_1: "np.ndarray", fit_2: "np.ndarray") -> "np.ndarray":
+        """Matrix engine version. Return the indexes of the new population, ordered from best to worst, in the
+        concatenation of both populations."""
+        raise NotImplementedError(f"{type(self).__name__} does not support the matrix engine.")
+
 class BestIndividualSelector(BasePopulationSelector):
     """Select the best n ind"""
     def select_population(self, new_pop_size: int, pop_1: List[Individual], pop_2: List[Individual]) -> List[Individual]:
         aux = [*pop_1, *pop_2]
-        aux.sort()
+        aux.sort(key=fit_key)
         return aux[:new_pop_size]
+
+    def select_population_matrix(self, new_pop_size: int, fit_1: "np.ndarray", fit_2: "np.ndarray") -> "np.ndarray":
+        return np.argsort(np.concatenate((fit_1, fit_2)), kind="stable")[:new_pop_size]
+
+
+class PartialBestIndividualSelector(BasePopulationSelector):
+    """Select the best n ind with a partial selection (argpartition, or heapq.nsmallest without numpy) over the
+    fitness values, instead of sorting both populations. Only the selected individuals are sorted, if sort_elite is
+    False only the best individual is placed first (the stall controls find the worst individuals with a partial
+    selection, so they do not need a sorted population).
+    """
+    def __init__(self, sort_elite: bool = True) -> None:
+        self.sort_elite = sort_elite
+
+    def select_indexes(self, new_pop_size: int, fit_values: List[float]) -> List[int]:
+        if new_pop_size >= len(fit_values):
+            selected = list(range(len(fit_values)))
+        elif np is None:
+            return heapq.nsmallest(new_pop_size, range(len(fit_values)), key=fit_values.__getitem__)
+        else:
+            selected = np.argpartition(fit_values, new_pop_size - 1)[:new_pop_size].tolist()
+        if self.sort_elite:
+            selected.sort(key=fit_values.__getitem__)
+        else:
+            best = min(range(len(selected)), key=lambda i: fit_values[selected[i]])
+            selected[0], selected[best] = selected[best], selected[0]
+        return selected
+
+    def select_population(self, new_pop_size: int, pop_1: List[Individual], pop_2: List[Individual]) -> List[Individual]:
+        aux = [*pop_1, *pop_2]
+        return [aux[i] for i in self.select_indexes(new_pop_size, [ind.fit() for ind in aux])]
+
+    def select_population_matrix(self, new_pop_size: int, fit_1: "np.ndarray", fit_2: "np.ndarray") -> "np.ndarray":
+        fit_values = np.concatenate((fit_1, fit_2))
+        if new_pop_size >= len(fit_values):
+            selected = np.arange(len(fit_values))
+        else:
+            selected = np.argpartition(fit_values, new_pop_size - 1)[:new_pop_size]
+        if self.sort_elite:
+            return selected[np.argsort(fit_values[selected], kind="stable")]
+        best = np.argmin(fit_values[selected])
+        selected[[0, best]] = selected[[best, 0]]
+        return selected
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from typing import Tuple, List, Dict
 from .individual import LOWER_GENE, UPPER_GENE
+from .utils import np
 import math
 
 class BaseRange(ABC):
@@ -37,6 +38,9 @@ class ExponentialRange(BaseRange):
         self.base = base
         self.gen_range = gen_range
 
+    def get_linear_helper(self) -> LinearRange:
+        return self.__linear_helper
+
     def get_real_from_gene(self, gene_value: float) -> float:
         return math.pow(self.base, self.__linear_helper.get_real_from_gene(gene_value))
          
@@ -55,6 +59,10 @@ class NegativeExponentialRange(BaseRange):
         self.base = base
         self.gen_range = gen_range
 
+    def get_linear_helpers(self) -> Tuple[LinearRange, LinearRange]:
+        """Return the (positive, negative) region helpers."""
+        return self.__linear_helper_positive, self.__linear_helper_negative
+
     def get_real_from_gene(self, gene_value: float) -> float:
         if gene_value >= self.gen_range[1] / 2: # positive region
             return math.pow(self.base, self.__linear_helper_positive.get_real_from_gene(gene_value))
@@ -69,10 +77,91 @@ class NegativeExponentialRange(BaseRange):
             raise Exception("A zero real value was found for a NegativeExponentialRange.")
 
 
+def stack_linear_ranges(list_of_ranges: List[LinearRange]) -> LinearRange:
+    """Return a LinearRange whose parameters are arrays, one entry per range. Its methods work element-wise on the
+    columns of a genes matrix."""
+    return LinearRange(np.array([r.lower_bound for r in list_of_ranges], dtype=np.float64),
+                       np.array([r.upper_bound for r in list_of_ranges], dtype=np.float64),
+                       gen_range=(np.array([r.gen_range[0] for r in list_of_ranges], dtype=np.float64),
+                                  np.array([r.gen_range[1] for r in list_of_ranges], dtype=np.float64)))
+
+
+class RangeDecoder:
+    """Compiled version of a range dict, used to decode (and encode) a whole (individuals x genes) matrix at once.
+    The genes are grouped by range type: all the LinearRange genes share a single affine transform, and the
+    ExponentialRange and NegativeExponentialRange genes are decoded with one transform per group. Genes with any
+    other BaseRange fall back to their own get_real_from_gene / get_gene_from_real.
+    The ranges are read when the decoder is created, create a new one if they are changed in place.
+    """
+    def __init__(self, range_dict: Dict[int, BaseRange], num_of_genes: int) -> None:
+        if np is None:
+            raise ImportError("The RangeDecoder requires numpy.")
+        self.num_of_genes = num_of_genes
+        groups = {LinearRange: [], ExponentialRange: [], NegativeExponentialRange: []}
+        self.others = []
+        for i in range(num_of_genes):
+            if type(range_dict[i]) in groups:
+                groups[type(range_dict[i])].append(i)
+            else:
+                self.others.append((i, range_dict[i]))
+
+        self.linear_cols = np.array(groups[LinearRange], dtype=np.intp)
+        self.linear = stack_linear_ranges([range_dict[i] for i in groups[LinearRange]])
+
+        self.exp_cols = np.array(groups[ExponentialRange], dtype=np.intp)
+        self.exp = stack_linear_ranges([range_dict[i].get_linear_helper() for i in groups[ExponentialRange]])
+        self.exp_base = np.array([range_dict[i].base for i in groups[ExponentialRange]], dtype=np.float64)
+
+        helpers = [range_dict[i].get_linear_helpers() for i in groups[NegativeExponentialRange]]
+        self.neg_cols = np.array(groups[NegativeExponentialRange], dtype=np.intp)
+        self.neg_positive = stack_linear_ranges([h[0] for h in helpers])
+        self.neg_negative = stack_linear_ranges([h[1] for h in helpers])
+        self.neg_base = np.array([range_dict[i].base for i in groups[NegativeExponentialRange]], dtype=np.float64)
+        self.neg_middle = np.array([range_dict[i].gen_range[1] / 2 for i in groups[NegativeExponentialRange]], dtype=np.float64)
+
+    def decode(self, genes: "np.ndarray") -> "np.ndarray":
+        """Return the matrix of real values of a (individuals x genes) matrix."""
+        genes = np.asarray(genes, dtype=np.float64).reshape(-1, self.num_of_genes)
+        real = np.empty_like(genes)
+        real[:, self.linear_cols] = self.linear.get_real_from_gene(genes[:, self.linear_cols])
+        real[:, self.exp_cols] = np.power(self.exp_base, self.exp.get_real_from_gene(genes[:, self.exp_cols]))
+
+        neg_genes = genes[:, self.neg_cols]
+        real[:, self.neg_cols] = np.where(neg_genes >= self.neg_middle,
+                                          np.power(self.neg_base, self.neg_positive.get_real_from_gene(neg_genes)),
+                                          -np.power(self.neg_base, self.neg_negative.get_real_from_gene(neg_genes)))
+        for i, r in self.others:
+            real[:, i] = [r.get_real_from_gene(g) for g in genes[:, i].tolist()]
+        return real
+
+    def encode(self, real: "np.ndarray") -> "np.ndarray":
+        """Inverse of decode."""
+        real = np.asarray(real, dtype=np.float64).reshape(-1, self.num_of_genes)
+        genes = np.empty_like(real)
+        genes[:, self.linear_cols] = self.linear.get_gene_from_real(real[:, self.linear_cols])
+        genes[:, self.exp_cols] = self.exp.get_gene_from_real(np.log(real[:, self.exp_cols]) / np.log(self.exp_base))
+
+        neg_real = real[:, self.neg_cols]
+        if (neg_real == 0).any():
+            raise Exception("A zero real value was found for a NegativeExponentialRange.")
+        exponent = np.log(np.abs(neg_real)) / np.log(self.neg_base)
+        genes[:, self.neg_cols] = np.where(neg_real > 0, self.neg_positive.get_gene_from_real(exponent),
+                                           self.neg_negative.get_gene_from_real(exponent))
+        for i, r in self.others:
+            genes[:, i] = [r.get_gene_from_real(v) for v in real[:, i].tolist()]
+        return genes
+
+
 def get_real_from_genes(list_of_genes: List[float], range_dict: Dict[int, BaseRange]) -> List[float]:
         return [range_dict[i].get_real_from_gene(gen) for i, gen in enumerate(list_of_genes)]
     
 
+def get_real_matrix_from_genes(genes_matrix: "np.ndarray", range_dict: Dict[int, BaseRange]) -> "np.ndarray":
+    """Decode a (individuals x genes) matrix, returning a matrix of real values with the same shape.
+    To decode several matrices with the same ranges, create a RangeDecoder once and reuse it."""
+    return RangeDecoder(range_dict, genes_matrix.shape[1]).decode(genes_matrix)
+
+
 def get_genes_from_real(list_of_real: List[float], range_dict: Dict[int, BaseRange]) -> List[float]:
     return [range_dict[i].get_gene_from_real(real) for i, real in enumerate(list_of_real)]
 
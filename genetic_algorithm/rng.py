@@ -0,0 +1,116 @@
+from typing import Any, Dict, List, MutableSequence, Optional, Sequence, Tuple
+import hashlib
+import random
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only required by the array draws
+    np = None
+
+
+def derive_seed(seed: int, name: str) -> int:
+    """Return a 64 bit seed for the stream name, which depends only on the seed and the name."""
+    return int.from_bytes(hashlib.sha256(f"{seed}:{name}".encode("utf-8")).digest()[:8], "little")
+
+
+class RandomStream:
+    """Source of the random numbers of a component. It wraps a random.Random, used for the single numbers, and a numpy
+    Generator, used for the bulk draws (numbers, matrix, ...), both seeded with seed. The bulk draws fall back to
+    random.Random when numpy is not available."""
+    def __init__(self, seed: Optional[int] = None, py_random: random.Random = None, generator: "np.random.Generator" = None) -> None:
+        self.py_random = py_random if py_random is not None else random.Random(seed)
+        if generator is None and np is not None:
+            generator = np.random.default_rng(seed)
+        self.generator = generator
+
+    def number(self) -> float:
+        return self.py_random.random()
+
+    def uniform(self, low: float, upper: float) -> float:
+        return self.py_random.uniform(low, upper)
+
+    def randint(self, low: int, upper: int) -> int:
+        return self.py_random.randint(low, upper)
+
+    def choices(self, population: Sequence, k: int) -> List:
+        return self.py_random.choices(population, k=k)
+
+    def shuffle(self, values: MutableSequence) -> None:
+        self.py_random.shuffle(values)
+
+    def numbers(self, n: int) -> List[float]:
+        """Return n numbers in [0, 1), drawn at once."""
+        if self.generator is not None:
+            return self.generator.random(n).tolist()
+        return [self.py_random.random() for _ in range(n)]
+
+    def uniform_list(self, n: int, low: float, upper: float) -> List[float]:
+        if self.generator is not None:
+            return self.generator.uniform(low, upper, n).tolist()
+        return [self.py_random.uniform(low, upper) for _ in range(n)]
+
+    def matrix(self, shape: Tuple[int, ...]) -> "np.ndarray":
+        return self.generator.random(shape)
+
+    def integers(self, low: int, upper: int, shape: Tuple[int, ...]) -> "np.ndarray":
+        """Integers in [low, upper)."""
+        return self.generator.integers(low, upper, size=shape)
+
+    def geometric(self, chance: float, size: int) -> "np.ndarray":
+        return self.generator.geometric(chance, size=size)
+
+    def permutations(self, n_permutations: int, size: int) -> "np.ndarray":
+        """Return a (n_permutations x size) array where each row is an independent permutation of range(size)."""
+        return self.generator.permuted(np.tile(np.arange(size), (n_permutations, 1)), axis=1)
+
+    def get_state(self) -> Dict[str, Any]:
+        return {"random": self.py_random.getstate(),
+                "numpy": self.generator.bit_generator.state if self.generator is not None else None}
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        self.py_random.setstate(state["random"])
+        if self.generator is not None and state["numpy"] is not None:
+            self.generator.bit_generator.state = state["numpy"]
+
+
+class RandomStreams:
+    """Central provider of random streams, seeded once. Each component asks for the stream of its name (e.g.
+    "crossover", "island_3"), which is seeded with derive_seed(seed, name): the streams are independent and do not
+    depend on the order they are created or used, so a run with the same seed is reproducible. Without a seed, one
+    is drawn from the system entropy (available at self.seed, to repeat the run)."""
+    def __init__(self, seed: Optional[int] = None) -> None:
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(64)
+        self.streams = {}
+
+    def stream(self, name: str) -> RandomStream:
+        if name not in self.streams:
+            self.streams[name] = RandomStream(self.derive_seed(name))
+        return self.streams[name]
+
+    def derive_seed(self, name: str) -> int:
+        """Seed of the stream name, e.g. to seed a component in another process."""
+        return derive_seed(self.seed, name)
+
+    def get_state(self) -> Dict[str, Dict[str, Any]]:
+        return {name: stream.get_state() for name, stream in self.streams.items()}
+
+    def set_state(self, state: Dict[str, Dict[str, Any]]) -> None:
+        for name, stream_state in state.items():
+            self.stream(name).set_state(stream_state)
+
+
+class ModuleRandomStream(RandomStream):
+    """Stream of the components without a seed. The numbers and lists are drawn from the random module, as
+    random.uniform would, so random.seed still repeats an unseeded run. The arrays are drawn from a numpy generator
+    shared by the whole process."""
+    def __init__(self) -> None:
+        super().__init__(py_random=random)
+
+    def numbers(self, n: int) -> List[float]:
+        return [self.py_random.random() for _ in range(n)]
+
+    def uniform_list(self, n: int, low: float, upper: float) -> List[float]:
+        return [self.py_random.uniform(low, upper) for _ in range(n)]
+
+
+DEFAULT_STREAM = ModuleRandomStream()
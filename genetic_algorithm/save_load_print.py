@@ -1,12 +1,52 @@
 from abc import ABC, abstractmethod
+import json
 import math
+import os
+import queue
+import threading
+import time
 
 from genetic_algorithm.range import BaseRange, get_real_from_genes, get_genes_from_real
-from .individual import Individual
-from typing import Dict, List
+from .individual import Individual, LOWER_GENE, UPPER_GENE
+from .matrix import PopulationMatrix
+from .rng import DEFAULT_STREAM
+from typing import Any, Dict, Iterator, List, Tuple
+
+
+def read_lines_backwards(path: str, block_size: int = 65536) -> Iterator[str]:
+    """Yield the lines of a file from the last to the first. The file is read backwards in blocks of block_size
+    bytes, so finding the last entries does not depend on the size of the file."""
+    with open(path, "rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        rest = b""
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            lines = (f.read(read_size) + rest).split(b"\n")
+            # the first piece can be the end of a line that starts in the previous block
+            rest = lines[0]
+            for line in reversed(lines[1:]):
+                yield line.decode("utf-8", errors="replace")
+        yield rest.decode("utf-8", errors="replace")
+
+
+def append_records(path: str, records: str) -> None:
+    """Append the records (each one ending with a new line) to the file. If the file does not end with a new line
+    (its last record was cut), a new line is written first, so the new records start on their own line."""
+    with open(path, "ab+") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size:
+            f.seek(size - 1)
+            if f.read(1) != b"\n":
+                records = "\n" + records
+        f.write(records.encode("utf-8"))
 
 
 class BaseSaveLoadPrint(ABC):
+    # source of the random numbers, replaced by the "log" stream of a seeded Population
+    rng = DEFAULT_STREAM
+
     @abstractmethod
     def init_log(self, list_of_individuals: List[Individual], log_file: str ="", log_config: Dict[str, str] = {}) -> Individual:
         raise NotImplementedError
@@ -23,17 +63,35 @@ class BaseSaveLoadPrint(ABC):
     def load_from_log(self) -> Individual:
         raise NotImplementedError
 
+    def flush(self) -> None:
+        """Write any pending record. Called by the Population when evolve returns or raises."""
+        pass
+
+    def get_state(self) -> Dict[str, Any]:
+        """State saved in the population checkpoints (see checkpoint.py), restored with set_state on a resume."""
+        return {}
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        pass
+
 
 class DefaultLog(BaseSaveLoadPrint):
     def __init__(self) -> None:
         self.config = {}
         self.n_genes = 0
         self.last_best = math.inf
+        # class of the loaded individuals, the one of the population (see init_log)
+        self.individual_class = Individual
+
+    def random_individual(self) -> Individual:
+        """Individual returned by load_from_log when there is nothing to load."""
+        return self.individual_class(self.n_genes, list_of_genes=self.rng.uniform_list(self.n_genes, LOWER_GENE, UPPER_GENE))
     
     def init_log(self, list_of_individuals: List[Individual], log_config: Dict[str, str], range_dict: Dict[int, BaseRange]) -> Individual:
         self.config = log_config
         self.range_dict = range_dict
         self.n_genes = list_of_individuals[0].get_num_of_genes()
+        self.individual_class = type(list_of_individuals[0])
 
         if self.config["print"]:
             print("======================================================================")
@@ -41,41 +99,56 @@ class DefaultLog(BaseSaveLoadPrint):
         
         return self.load_from_log()
 
+    def get_state(self) -> Dict[str, Any]:
+        # the best fitness already written, so a resumed run does not write it again
+        return {"last_best": self.last_best}
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        self.last_best = state.get("last_best", math.inf)
+
     def update_log(self, gen: int, max_gen: int,  list_of_individuals: List[Individual]) -> None:
         if list_of_individuals[0].fit() < self.last_best:
             self.last_best = list_of_individuals[0].fit()
             self.save_to_log(list_of_individuals[0])
         self.print_log(gen, max_gen, list_of_individuals)
 
+    def real_genes(self, ind: Individual) -> List[float]:
+        """Decoded genes of ind, cached by the individuals that provide real_genes (e.g. CompactIndividual)."""
+        if hasattr(ind, "real_genes"):
+            return ind.real_genes(self.range_dict)
+        return get_real_from_genes(ind.genes(), self.range_dict)
+
     def convert_individual_to_str(self, ind: Individual) -> str:
         ind_str = f"fit:{ind.fit():10.4e},real_gen:"
-        return ind_str + ",".join([f"{r}" for r in get_real_from_genes(ind.genes(), self.range_dict)])
+        return ind_str + ",".join([f"{r}" for r in self.real_genes(ind)])
     
     def convert_str_to_individual(self, parsed_str: str) -> Individual:
         if not parsed_str:
-            return Individual(self.n_genes)
+            return self.random_individual()
         _ , real_genes = parsed_str.split("real_gen:")
         real_genes = [float(x) for x in real_genes.split(",")]
-        return Individual(self.n_genes, list_of_genes=get_genes_from_real(real_genes, self.range_dict))
+        if len(real_genes) != self.n_genes:
+            raise ValueError(f"Expected {self.n_genes} genes, found {len(real_genes)}.")
+        return self.individual_class(self.n_genes, list_of_genes=get_genes_from_real(real_genes, self.range_dict))
         
     def save_to_log(self, ind: Individual) -> None:
         if "log_path" in self.config:
-            with open(self.config["log_path"], "a") as f:
-                f.write(self.convert_individual_to_str(ind))
+            append_records(self.config["log_path"], self.convert_individual_to_str(ind) + "\n")
 
     def load_from_log(self) -> Individual:
-        """Try to load a log file with a solution. If it succeeds, set the first individual with the genes loaded. """
-        last_entry = ""
-        if "log_path" in self.config:    
-            with open(self.config["log_path"], "r") as f:
-                all_lines = f.readlines()
-                for i in range(-1, -(len(all_lines)+1), -1):
-                    last_entry = all_lines[i].strip(" \n\r")
-                    if last_entry:
-                        break
-        if last_entry:    
-            return self.convert_str_to_individual(last_entry)
-        return Individual(self.n_genes)
+        """Try to load a log file with a solution. If it succeeds, set the first individual with the genes loaded.
+        The file is read from the end, and entries that cannot be parsed (e.g. a line truncated by a crash) are skipped.
+        The last line is loaded even without a new line at the end, as the logs written before the records ended with
+        one (each record was written after a new line)."""
+        if "log_path" in self.config:
+            for entry in read_lines_backwards(self.config["log_path"]):
+                entry = entry.strip(" \n\r")
+                if entry:
+                    try:
+                        return self.convert_str_to_individual(entry)
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        return self.random_individual()
 
     def print_log(self, n_gen: int, max_gen: int, list_of_ind: List[Individual]) -> None:
         if self.config["print"]:
@@ -83,4 +156,105 @@ class DefaultLog(BaseSaveLoadPrint):
                 print("======================================================================")
                 print(f" gen: {n_gen:<8}|| progress: {100*(n_gen/max_gen):3.2f}% " + 
                         f"|| cur_best: {list_of_ind[0].fit():10.2E} "+
-                        f"|| cur_avg: {sum([x.fit() for x in list_of_ind]) / len(list_of_ind):10.2E}")
+                        f"|| cur_avg: {average_fit(list_of_ind):10.2E}")
+
+
+class BufferedJSONLog(DefaultLog):
+    """Same as DefaultLog, but each record is a JSON object in its own line:
+        {"gen": <generation>, "time": <unix timestamp>, "fit": <fitness>, "real_genes": [...]}
+    The records are queued and written by a background thread in batches, when batch_size records are pending or
+    flush_interval seconds after the first pending record. Population.evolve calls flush when it returns or raises.
+    Call close when done, to write the pending records and stop the writer thread.
+    """
+    def __init__(self, batch_size: int = 100, flush_interval: float = 1.0) -> None:
+        super().__init__()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.generation = 0
+        self.records = queue.Queue()
+        self.writer = None
+        self.error = None
+
+    def update_log(self, gen: int, max_gen: int,  list_of_individuals: List[Individual]) -> None:
+        self.generation = gen
+        super().update_log(gen, max_gen, list_of_individuals)
+
+    def convert_individual_to_str(self, ind: Individual) -> str:
+        return json.dumps({"gen": self.generation,
+                           "time": time.time(),
+                           "fit": ind.fit(),
+                           "real_genes": self.real_genes(ind)})
+
+    def convert_str_to_individual(self, parsed_str: str) -> Individual:
+        if not parsed_str:
+            return self.random_individual()
+        record = json.loads(parsed_str)
+        if len(record["real_genes"]) != self.n_genes:
+            raise ValueError(f"Expected {self.n_genes} genes, found {len(record['real_genes'])}.")
+        return self.individual_class(self.n_genes, list_of_genes=get_genes_from_real(record["real_genes"], self.range_dict))
+
+    def save_to_log(self, ind: Individual) -> None:
+        if "log_path" in self.config:
+            if self.writer is None:
+                self.writer = threading.Thread(target=self.write_records, daemon=True)
+                self.writer.start()
+            self.records.put((self.config["log_path"], self.convert_individual_to_str(ind) + "\n"))
+
+    def write_records(self) -> None:
+        """Main loop of the writer thread. A threading.Event in the queue is a flush request, set once written, and
+        "close" writes the pending records and ends the thread."""
+        pending = []
+        deadline = None
+        while True:
+            try:
+                record = self.records.get(timeout=None if deadline is None else max(deadline - time.monotonic(), 0.0))
+            except queue.Empty:
+                record = None
+            if isinstance(record, tuple):
+                pending.append(record)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            closing = record == "close"
+            if pending and (record is None or isinstance(record, threading.Event) or closing or len(pending) >= self.batch_size):
+                try:
+                    self.write_pending(pending)
+                except Exception as e:
+                    # raised by the next flush
+                    self.error = e
+                pending = []
+                deadline = None
+            if isinstance(record, threading.Event):
+                record.set()
+            if closing:
+                return
+
+    def write_pending(self, pending: List[Tuple[str, str]]) -> None:
+        # the records are grouped by file, in case the log path is changed during the run
+        for path in dict.fromkeys([p for p, _ in pending]):
+            append_records(path, "".join([line for p, line in pending if p == path]))
+
+    def flush(self) -> None:
+        if self.writer is not None:
+            written = threading.Event()
+            self.records.put(written)
+            written.wait()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.records.put("close")
+            self.writer.join()
+            self.writer = None
+        self.flush()
+
+    def load_from_log(self) -> Individual:
+        self.flush()
+        return super().load_from_log()
+
+
+def average_fit(list_of_ind: List[Individual]) -> float:
+    if isinstance(list_of_ind, PopulationMatrix):
+        return float(list_of_ind.fit_values.mean())
+    return sum([x.fit() for x in list_of_ind]) / len(list_of_ind)
@@ -1,17 +1,56 @@
 from abc import ABC, abstractmethod
+from collections import deque
+import heapq
 import math
 from .individual import Individual
-from typing import List
+from .utils import np
+from .rng import DEFAULT_STREAM
+from typing import Any, Dict, List, Optional, Tuple
 
 class BaseStallControl(ABC):
     """Framework to model stall controllers. The function return a cur_generation, most useful to run twin
     populations and ensure the total number of generations.
     """
+    # source of the random numbers, replaced by the "stall" stream of a seeded Population
+    rng = DEFAULT_STREAM
+    # reason of the end of the evolution, when the controller ends it by returning max_generations
+    stop_reason = None
+
     # TODO: use *args
     @abstractmethod
     def stall_pop(self, cur_generation: int, max_generations: int, pop: List[Individual]) -> int:
         raise NotImplementedError
 
+    def stall_matrix(self, cur_generation: int, max_generations: int, pop: "PopulationMatrix") -> int:
+        """Matrix engine version, receives a matrix.PopulationMatrix instead of a list of individuals."""
+        raise NotImplementedError(f"{type(self).__name__} does not support the matrix engine.")
+
+    def get_state(self) -> Dict[str, Any]:
+        """State saved in the population checkpoints (see checkpoint.py). By default, all the attributes except
+        the random stream, which is saved by the population."""
+        state = dict(self.__dict__)
+        state.pop("rng", None)
+        return state
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+
+
+def worst_indexes(pop: List[Individual], n_ind: int) -> List[int]:
+    """Return the indexes of the n_ind worst individuals, never the first (best) one. The partial selection does not
+    need a sorted population, e.g. after PartialBestIndividualSelector(sort_elite=False). On a tie, the last
+    individuals are randomized."""
+    return heapq.nlargest(n_ind, range(1, len(pop)), key=lambda i: (pop[i].fit(), i))
+
+
+def worst_rows(pop: "PopulationMatrix", n_ind: int) -> "np.ndarray":
+    """Matrix engine version of worst_indexes."""
+    n_rest = len(pop) - 1
+    if n_ind <= 0 or n_rest <= 0:
+        return np.empty(0, dtype=np.intp)
+    n_ind = min(n_ind, n_rest)
+    return np.argpartition(pop.fit_values[1:], n_rest - n_ind)[n_rest - n_ind:] + 1
+
 
 class GenerationStallControl(BaseStallControl):
     def __init__(self, num_of_generations: int = 100, ind_ratio: float = 0.3) -> None:
@@ -20,6 +59,130 @@ class GenerationStallControl(BaseStallControl):
 
     def stall_pop(self, cur_generation: int, max_generations: int, pop: List[Individual]) -> int:
         if cur_generation % self.num_of_generations == 0:
-            for i in range(-1, -math.ceil(len(pop)*self.ind_ratio), -1):
-                pop[i].randomize_genes()
-        return cur_generation
\ No newline at end of file
+            for i in sorted(worst_indexes(pop, math.ceil(len(pop)*self.ind_ratio) - 1), reverse=True):
+                pop[i].randomize_genes(self.rng)
+        return cur_generation
+
+    def stall_matrix(self, cur_generation: int, max_generations: int, pop: "PopulationMatrix") -> int:
+        if cur_generation % self.num_of_generations == 0:
+            rows = np.sort(worst_rows(pop, math.ceil(len(pop)*self.ind_ratio) - 1))
+            if len(rows):
+                pop.randomize_rows(rows, self.rng)
+        return cur_generation
+
+
+def gene_sums(pop: List[Individual], n_genes: int) -> Tuple[List[float], List[float]]:
+    """Return the sum of each gene and the sum of its squares over the individuals."""
+    if not pop:
+        return [0.0]*n_genes, [0.0]*n_genes
+    columns = list(zip(*[ind.genes_view() for ind in pop]))
+    return [math.fsum(c) for c in columns], [math.fsum([g*g for g in c]) for c in columns]
+
+
+class ConvergenceStallControl(BaseStallControl):
+    """Restart or end the evolution when it stops making progress. After window generations (since the start or
+    the last restart), the progress stalls when the best fitness improved less than min_improvement in the last
+    window generations, or when the diversity of the population (the mean of the gene-wise variance, between 0 and
+    0.25) is below min_diversity. The first max_restarts times, the worst ind_ratio of the population is randomized
+    and the window starts again. After that, the evolution ends (the controller returns max_generations) and the
+    reason is kept in self.stop_reason, see also Population.stop_reason.
+
+    With the individual engine, the sums of the genes and of their squares are only updated with the individuals
+    that entered or left the population since the previous generation. The matrix engine computes the variance of
+    the genes matrix at once.
+    """
+    def __init__(self, window: int = 50, min_improvement: float = 1e-8, min_diversity: float = 1e-6,
+                 ind_ratio: float = 0.3, max_restarts: int = 3) -> None:
+        self.window = window
+        self.min_improvement = min_improvement
+        self.min_diversity = min_diversity
+        self.ind_ratio = ind_ratio
+        self.max_restarts = max_restarts
+        self.reset()
+
+    def reset(self) -> None:
+        self.best_history = deque(maxlen=self.window + 1)
+        self.restarts = 0
+        self.last_generation = 0
+        self.diversity = None
+        self.stop_reason = None
+        self.members = {}
+        self.sums = None
+
+    def get_state(self) -> Dict[str, Any]:
+        # the gene sums are computed again after a resume
+        state = super().get_state()
+        state.pop("members")
+        state.pop("sums")
+        return state
+
+    def start_generation(self, cur_generation: int) -> None:
+        if cur_generation <= self.last_generation:
+            # a new evolution
+            self.reset()
+        self.last_generation = cur_generation
+
+    def update_diversity(self, pop: List[Individual]) -> float:
+        current = {id(ind): ind for ind in pop}
+        added = [ind for key, ind in current.items() if key not in self.members]
+        removed = [ind for key, ind in self.members.items() if key not in current]
+        n_genes = pop[0].get_num_of_genes()
+        if self.sums is None or len(added) + len(removed) >= len(pop):
+            self.sums = gene_sums(pop, n_genes)
+        else:
+            (added_1, added_2), (removed_1, removed_2) = gene_sums(added, n_genes), gene_sums(removed, n_genes)
+            self.sums = ([s + a - r for s, a, r in zip(self.sums[0], added_1, removed_1)],
+                         [s + a - r for s, a, r in zip(self.sums[1], added_2, removed_2)])
+        # the removed individuals are kept until here, so their id is not reused by a new individual
+        self.members = current
+        n = len(pop)
+        return max(math.fsum([s_2 / n - (s_1 / n)**2 for s_1, s_2 in zip(*self.sums)]) / n_genes, 0.0)
+
+    def check_progress(self, best_fit: float, diversity: float) -> Optional[str]:
+        """Return the reason to restart (or end) the evolution, or None if it is making progress."""
+        self.diversity = diversity
+        self.best_history.append(best_fit)
+        if len(self.best_history) < self.best_history.maxlen:
+            return None
+        if self.best_history[0] - best_fit < self.min_improvement:
+            return f"the best fitness improved less than {self.min_improvement} in {self.window} generations"
+        if diversity < self.min_diversity:
+            return f"the diversity ({diversity:.3g}) is below {self.min_diversity}"
+        return None
+
+    def n_restarted(self, pop_size: int) -> int:
+        """Number of individuals randomized by a restart, keeping at least the best one."""
+        return min(math.ceil(pop_size*self.ind_ratio), pop_size - 1)
+
+    def restarted(self) -> None:
+        self.restarts += 1
+        self.best_history.clear()
+        # the randomized individuals changed in place
+        self.sums = None
+
+    def stop(self, reason: str, max_generations: int) -> int:
+        self.stop_reason = f"{reason}, after {self.restarts} restarts"
+        return max_generations
+
+    def stall_pop(self, cur_generation: int, max_generations: int, pop: List[Individual]) -> int:
+        self.start_generation(cur_generation)
+        reason = self.check_progress(pop[0].fit(), self.update_diversity(pop))
+        if reason is None:
+            return cur_generation
+        if self.restarts >= self.max_restarts:
+            return self.stop(reason, max_generations)
+        for i in sorted(worst_indexes(pop, self.n_restarted(len(pop)))):
+            pop[i].randomize_genes(self.rng)
+        self.restarted()
+        return cur_generation
+
+    def stall_matrix(self, cur_generation: int, max_generations: int, pop: "PopulationMatrix") -> int:
+        self.start_generation(cur_generation)
+        reason = self.check_progress(float(pop.fit_values.min()), float(pop.genes.var(axis=0).mean()))
+        if reason is None:
+            return cur_generation
+        if self.restarts >= self.max_restarts:
+            return self.stop(reason, max_generations)
+        pop.randomize_rows(np.sort(worst_rows(pop, self.n_restarted(len(pop)))), self.rng)
+        self.restarted()
+        return cur_generation
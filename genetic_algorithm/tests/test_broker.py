@@ -0,0 +1,109 @@
+import pytest
+import socket
+import threading
+from multiprocessing import Process
+from typing import List
+from genetic_algorithm.population import Population
+from genetic_algorithm.broker import *
+
+
+def first_gene(inputs: List[float]) -> float:
+    return inputs[0]
+
+
+def failing_fitness(inputs: List[float]) -> float:
+    raise ValueError("bad genes")
+
+
+def start_thread_worker(evaluator: BrokerEvaluator, fitness_fun=first_gene, batch: bool = False) -> threading.Thread:
+    worker = threading.Thread(target=run_worker, args=(*evaluator.address, fitness_fun, batch), daemon=True)
+    worker.start()
+    return worker
+
+
+class TestBroker:
+
+    def test_pack_doubles(self) -> None:
+        assert unpack_doubles(pack_doubles([1.5, -2.0, 1e-300])) == [1.5, -2.0, 1e-300]
+        assert pack_doubles([1.0]) == struct.pack("!d", 1.0)
+        assert pack_doubles([1.0], "little") == struct.pack("<d", 1.0)
+        assert unpack_doubles(pack_doubles([1.5, -2.0], "little"), "little") == [1.5, -2.0]
+
+    def test_order_with_several_workers(self) -> None:
+        with BrokerEvaluator(task_size=7, timeout=10.0) as evaluator:
+            for _ in range(3):
+                start_thread_worker(evaluator)
+            all_real_genes = [[float(i), 0.0] for i in range(100)]
+            assert evaluator.evaluate_all(None, all_real_genes) == [float(i) for i in range(100)]
+
+    def test_batch_worker(self) -> None:
+        np = pytest.importorskip("numpy")
+        with BrokerEvaluator(task_size=10, timeout=10.0) as evaluator:
+            start_thread_worker(evaluator, lambda x: x[:, 1], batch=True)
+            all_fit = evaluator.evaluate_all(None, np.arange(50, dtype=float).reshape(25, 2), batch=True)
+        assert all_fit == [float(2*i + 1) for i in range(25)]
+
+    def test_worker_error(self) -> None:
+        with BrokerEvaluator(timeout=10.0) as evaluator:
+            start_thread_worker(evaluator, failing_fitness)
+            with pytest.raises(Exception, match="bad genes"):
+                evaluator.evaluate_all(None, [[1.0]])
+
+    def test_timeout_without_workers(self) -> None:
+        with BrokerEvaluator(timeout=0.2) as evaluator:
+            with pytest.raises(Exception):
+                evaluator.evaluate_all(None, [[1.0]])
+
+    def test_requeue_on_disconnect(self) -> None:
+        with BrokerEvaluator(task_size=5, timeout=10.0) as evaluator:
+            def bad_worker() -> None:
+                # receive a task and disconnect without answering, then start a good worker
+                with socket.create_connection(evaluator.address) as sock:
+                    receive_message(sock)
+                start_thread_worker(evaluator)
+
+            threading.Thread(target=bad_worker, daemon=True).start()
+            all_real_genes = [[float(i)] for i in range(20)]
+            assert evaluator.evaluate_all(None, all_real_genes) == [float(i) for i in range(20)]
+
+    def test_late_results_are_dropped(self) -> None:
+        with BrokerEvaluator(timeout=0.2) as evaluator:
+            with pytest.raises(Exception):
+                evaluator.evaluate_all(None, [[1.0]])
+            assert evaluator.pending == set()
+            evaluator.timeout = 10.0
+            start_thread_worker(evaluator)
+            # the cancelled task is not sent to the worker, nor its result kept
+            assert evaluator.evaluate_all(None, [[2.0]]) == [2.0]
+            assert evaluator.results == {}
+            assert evaluator.errors == {}
+
+    def test_requeue_on_task_timeout(self) -> None:
+        with BrokerEvaluator(task_size=5, timeout=10.0, task_timeout=0.2) as evaluator:
+            release = threading.Event()
+
+            def hung_worker() -> None:
+                # receive a task and never answer, then start a good worker
+                with socket.create_connection(evaluator.address) as sock:
+                    receive_message(sock)
+                    start_thread_worker(evaluator)
+                    release.wait(10.0)
+
+            threading.Thread(target=hung_worker, daemon=True).start()
+            all_real_genes = [[float(i)] for i in range(20)]
+            assert evaluator.evaluate_all(None, all_real_genes) == [float(i) for i in range(20)]
+            release.set()
+
+    def test_population_with_process_workers(self) -> None:
+        with BrokerEvaluator(task_size=8, timeout=30.0) as evaluator:
+            workers = [Process(target=run_worker, args=(*evaluator.address, sum), daemon=True) for _ in range(2)]
+            for worker in workers:
+                worker.start()
+            my_pop = Population(3, 30, sum)
+            my_pop.log["print"] = False
+            my_pop.set_models(evaluator=evaluator)
+            fit, real_genes, _ = my_pop.evolve(5, target=-1.0)
+            assert fit == sum(real_genes)
+        for worker in workers:
+            worker.join(timeout=5.0)
+            assert not worker.is_alive()
@@ -0,0 +1,140 @@
+import pytest
+from genetic_algorithm.population import *
+from genetic_algorithm.cache import *
+
+
+class TestFitnessCache:
+
+    def test_hit_and_miss(self) -> None:
+        cache = FitnessCache()
+        assert cache.get([0.1, 0.2]) is None
+        cache.put([0.1, 0.2], 3.0)
+        assert cache.get([0.1, 0.2]) == 3.0
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert cache.hit_rate() == 0.5
+
+    def test_lru_eviction(self) -> None:
+        cache = FitnessCache(max_size=2)
+        cache.put([0.1], 1.0)
+        cache.put([0.2], 2.0)
+        cache.get([0.1])
+        cache.put([0.3], 3.0)
+        assert len(cache) == 2
+        assert cache.get([0.2]) is None
+        assert cache.get([0.1]) == 1.0
+
+    def test_resolution(self) -> None:
+        cache = FitnessCache(resolution=0.01)
+        cache.put([0.5001, 0.2], 1.0)
+        assert cache.get([0.4999, 0.2]) == 1.0
+        assert cache.get([0.52, 0.2]) is None
+
+
+class TestSqliteFitnessCache:
+
+    def test_shared_across_runs(self, tmp_path) -> None:
+        path = str(tmp_path / "cache.db")
+        cache = SqliteFitnessCache(path, version="v1", batch_size=2)
+        cache.put_many([[0.1, 0.2], [0.3, 0.4]], [1.0, 2.0])
+        cache.put([0.5, 0.6], 3.0)
+        # the last entry is still pending, but it is visible
+        assert len(cache.pending) == 1
+        assert cache.get([0.5, 0.6]) == 3.0
+        cache.close()
+
+        cache = SqliteFitnessCache(path, version="v1")
+        assert cache.get_many([[0.1, 0.2], [0.5, 0.6], [0.7, 0.8]]) == [1.0, 3.0, None]
+        assert (cache.hits, cache.misses) == (2, 1)
+        cache.close()
+
+    def test_version(self, tmp_path) -> None:
+        path = str(tmp_path / "cache.db")
+        cache = SqliteFitnessCache(path, version="v1")
+        cache.put([0.1, 0.2], 1.0)
+        cache.close()
+
+        cache = SqliteFitnessCache(path, version="v2")
+        assert cache.get([0.1, 0.2]) is None
+        cache.close()
+
+    def test_flush_on_failed_evolution(self, tmp_path) -> None:
+        path = str(tmp_path / "cache.db")
+        calls = []
+        def f(inputs):
+            calls.append(inputs)
+            if len(calls) > 100:
+                raise ValueError("fitness failed")
+            return sum(inputs)
+
+        my_pop = Population(3, 30, f)
+        my_pop.log["print"] = False
+        cache = SqliteFitnessCache(path)
+        my_pop.set_models(cache=cache)
+        with pytest.raises(ValueError):
+            my_pop.evolve(10, target=-1.0)
+        assert cache.pending == {}
+        cache.close()
+
+    def test_population_restart(self, tmp_path) -> None:
+        path = str(tmp_path / "cache.db")
+        my_pop = Population(3, 30, sum)
+        my_pop.log["print"] = False
+        cache = SqliteFitnessCache(path)
+        my_pop.set_models(cache=cache)
+        my_pop.evolve(5, target=-1.0)
+        cache.close()
+
+        all_genes = [ind.genes() for ind in my_pop.pop]
+        cache = SqliteFitnessCache(path)
+        assert None not in cache.get_many(all_genes)
+        cache.close()
+
+
+def test_population_with_cache() -> None:
+    calls = []
+    def f(inputs):
+        calls.append(inputs)
+        return sum(inputs)
+
+    cache = FitnessCache()
+    my_pop = Population(3, 10, f)
+    my_pop.set_models(cache=cache)
+    my_pop.calculate_all_fitness(my_pop.pop)
+    assert len(calls) == 10
+
+    my_pop.pop[0].set_all_genes(my_pop.pop[1].genes())
+    my_pop.calculate_all_fitness(my_pop.pop)
+    assert len(calls) == 10
+    assert cache.hits == 1
+    assert my_pop.evaluations["total"] == 10
+
+
+@pytest.mark.parametrize("engine", ["individual", "matrix"])
+def test_identical_misses_are_evaluated_once(engine: str) -> None:
+    if engine == "matrix":
+        pytest.importorskip("numpy")
+    calls = []
+    def f(inputs):
+        calls.append(inputs)
+        return sum(inputs)
+
+    my_pop = Population(3, 10, f, engine=engine)
+    my_pop.set_models(cache=FitnessCache())
+    for i in range(1, 10):
+        my_pop.pop[i] = Individual(3, list_of_genes=my_pop.pop[0].genes())
+    my_pop.calculate_all_fitness(my_pop.pop)
+    assert len(calls) == 1
+    assert my_pop.evaluations["total"] == 1
+    assert len({ind.fit() for ind in my_pop.pop}) == 1
+
+
+def test_matrix_population_with_cache() -> None:
+    pytest.importorskip("numpy")
+    cache = FitnessCache()
+    my_pop = Population(3, 10, sum, engine="matrix")
+    my_pop.set_models(cache=cache)
+    my_pop.calculate_all_fitness(my_pop.pop)
+    my_pop.pop.require_update[:] = True
+    my_pop.calculate_all_fitness(my_pop.pop)
+    assert cache.hits == 10
+    assert my_pop.evaluations["total"] == 10
@@ -0,0 +1,126 @@
+import pytest
+import os
+import time
+from genetic_algorithm.population import Population
+from genetic_algorithm.checkpoint import save_checkpoint, load_checkpoint
+from genetic_algorithm.individual import Individual, CompactIndividual
+from genetic_algorithm.matrix import PopulationMatrix
+
+
+def test_save_load_individuals(tmp_path) -> None:
+    path = str(tmp_path / "pop.ckpt")
+    pop = [Individual(3, list_of_genes=[0.1*i, 0.2, 0.3]) for i in range(5)]
+    for ind in pop[:3]:
+        ind.set_fit_value(sum(ind.genes()))
+    save_checkpoint(path, pop, 42, {"key": [1, 2]})
+    assert not os.path.exists(path + ".tmp")
+
+    loaded, generation, state = load_checkpoint(path, individual_class=CompactIndividual)
+    assert generation == 42 and state == {"key": [1, 2]}
+    assert all([isinstance(ind, CompactIndividual) for ind in loaded])
+    assert [ind.genes() for ind in loaded] == [ind.genes() for ind in pop]
+    assert [ind.require_update() for ind in loaded] == [False]*3 + [True]*2
+    assert [ind.fit() for ind in loaded[:3]] == [ind.fit() for ind in pop[:3]]
+
+
+def test_save_load_matrix(tmp_path) -> None:
+    np = pytest.importorskip("numpy")
+    path = str(tmp_path / "pop.ckpt")
+    pop = PopulationMatrix.random(10, 4)
+    pop.set_fit_values(np.arange(5), np.arange(5.0))
+    save_checkpoint(path, pop, 7, {})
+
+    loaded, generation, _ = load_checkpoint(path, engine="matrix")
+    assert generation == 7
+    assert (loaded.genes == pop.genes).all()
+    assert (loaded.require_update == pop.require_update).all()
+    assert (loaded.fit_values[:5] == np.arange(5.0)).all()
+
+
+def test_truncated_file(tmp_path) -> None:
+    path = str(tmp_path / "pop.ckpt")
+    save_checkpoint(path, [Individual(2) for _ in range(3)], 1, {})
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data[:-5])
+    with pytest.raises(Exception):
+        load_checkpoint(path)
+
+
+@pytest.mark.parametrize("engine", ["individual", "matrix"])
+def test_resume_is_reproducible(tmp_path, engine: str) -> None:
+    if engine == "matrix":
+        pytest.importorskip("numpy")
+    path = str(tmp_path / "pop.ckpt")
+    my_pop = Population(3, 30, sum, engine=engine)
+    my_pop.log["print"] = False
+    my_pop.set_checkpoint_file(path, gen_freq=5)
+    my_pop.evolve(5, target=-1.0)
+    with open(path, "rb") as f:
+        checkpoint = f.read()
+
+    results = []
+    for _ in range(2):
+        with open(path, "wb") as f:
+            f.write(checkpoint)
+        other_pop = Population(3, 30, sum, engine=engine)
+        other_pop.log["print"] = False
+        other_pop.set_checkpoint_file(path, gen_freq=1000)
+        results.append((other_pop.evolve(12, target=-1.0, resume=True), other_pop.evaluations["total"]))
+    assert results[0] == results[1]
+    assert results[0][1] > my_pop.evaluations["total"]
+
+
+def test_resume_without_checkpoint(tmp_path) -> None:
+    my_pop = Population(3, 30, sum)
+    my_pop.log["print"] = False
+    my_pop.set_checkpoint_file(str(tmp_path / "missing.ckpt"), gen_freq=1000)
+    fit, real_genes, _ = my_pop.evolve(3, target=-1.0, resume=True)
+    assert fit == sum(real_genes)
+
+
+def test_checkpoint_time(tmp_path) -> None:
+    pytest.importorskip("numpy")
+    my_pop = Population(10, 100000, sum, engine="matrix")
+    my_pop.set_checkpoint_file(str(tmp_path / "pop.ckpt"))
+    my_pop.save_checkpoint(1)
+    assert 0.0 < my_pop.checkpoint["last_time"] < 1.0
+
+
+def test_seeded_resume_matches_the_full_run(tmp_path) -> None:
+    path = str(tmp_path / "pop.ckpt")
+    results = []
+    for max_generations, resume in ((12, False), (5, False), (12, True)):
+        my_pop = Population(3, 30, sum, seed=9)
+        my_pop.log["print"] = False
+        my_pop.set_checkpoint_file(path, gen_freq=5)
+        results.append(my_pop.evolve(max_generations, target=-1.0, resume=resume))
+    assert results[2] == results[0]
+
+
+def test_resume_keeps_the_log_and_timers(tmp_path) -> None:
+    path = str(tmp_path / "pop.ckpt")
+    log_file = tmp_path / "log_file.txt"
+    log_file.touch()
+    for max_generations, resume in ((5, False), (8, True), (5, True)):
+        my_pop = Population(3, 30, lambda x: 1.0)
+        my_pop.log["print"] = False
+        my_pop.set_log_file(str(log_file))
+        my_pop.set_checkpoint_file(path, gen_freq=5)
+        my_pop.evolve(max_generations, target=-1.0, resume=resume)
+    # the constant best fitness is only written by the first generation
+    assert len(log_file.read_text().splitlines()) == 1
+    # the last run resumes at the end, with the timers of the first 5 generations
+    assert my_pop.timers["total"]["evaluate"] > 0.0
+
+
+def test_loaded_matrix_is_writeable(tmp_path) -> None:
+    pytest.importorskip("numpy")
+    path = str(tmp_path / "pop.ckpt")
+    save_checkpoint(path, PopulationMatrix.random(6, 3), 1, {})
+    loaded, _, _ = load_checkpoint(path, engine="matrix")
+    loaded.randomize_rows([0])
+    loaded[1] = Individual(3, list_of_genes=[0.5, 0.5, 0.5])
+    assert loaded.genes[1].tolist() == [0.5, 0.5, 0.5]
+    assert loaded.require_update[0] and loaded.require_update[1]
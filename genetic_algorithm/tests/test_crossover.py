@@ -0,0 +1,45 @@
+import pytest
+from typing import List
+from genetic_algorithm.crossover import *
+from genetic_algorithm.individual import Individual
+
+
+def create_parents() -> List[Individual]:
+    return [Individual(4, list_of_genes=[0.0]*4), Individual(4, list_of_genes=[1.0]*4)]
+
+
+class TestRandomCrossover:
+
+    def test_number_of_children(self) -> None:
+        children = RandomCrossover(children_ratio=0.5).generate_all_offspring(create_parents(), [(0, 1)]*10)
+        assert len(children) == 10
+
+    def test_genes_come_from_parents(self) -> None:
+        children = RandomCrossover(children_ratio=1.0).generate_all_offspring(create_parents(), [(0, 1)]*50)
+        for child_1, child_2 in zip(children[0::2], children[1::2]):
+            assert [g_1 + g_2 for g_1, g_2 in zip(child_1.genes(), child_2.genes())] == [1.0]*4
+            # at least one gene is kept from the first parent
+            assert 0.0 in child_1.genes()
+
+    def test_kernel_all_swapped(self, monkeypatch) -> None:
+        np = pytest.importorskip("numpy")
+        import genetic_algorithm.crossover as crossover
+        monkeypatch.setattr(crossover, "generate_random_matrix", lambda shape, rng=None: np.zeros(shape))
+        children = random_crossover_kernel(np.zeros((1, 3)), np.ones((1, 3)))
+        assert children.tolist() == [[1.0, 1.0, 0.0], [0.0, 0.0, 1.0]]
+
+
+class TestSBXCrossover:
+
+    def test_children_bounds(self) -> None:
+        children = SBXCrossover(children_ratio=1.0).generate_all_offspring(create_parents(), [(0, 1)]*50)
+        assert len(children) == 100
+        assert all([0.0 <= g <= 1.0 for child in children for g in child.genes()])
+
+    def test_matrix_one_beta_per_pair(self) -> None:
+        np = pytest.importorskip("numpy")
+        parents = np.array([[0.2, 0.2, 0.2], [0.4, 0.4, 0.4]])
+        children = SBXCrossover(children_ratio=1.0).generate_all_offspring_matrix(parents, np.array([[0, 1]]*20))
+        assert children.shape == (40, 3)
+        # the same beta is used for all the genes of a pair
+        assert np.allclose(children, children[:, :1])
@@ -0,0 +1,122 @@
+import pytest
+from typing import List
+import asyncio
+from genetic_algorithm.population import *
+from genetic_algorithm.evaluator import *
+
+
+def first_gene(inputs: List[float]) -> float:
+    return inputs[0]
+
+
+def last_column(inputs):
+    return inputs[:, -1]
+
+
+class TestEvaluator:
+
+    def test_serial_order(self) -> None:
+        assert SerialEvaluator().evaluate_all(first_gene, [[3.0], [1.0], [2.0]]) == [3.0, 1.0, 2.0]
+
+    def test_thread_pool_order(self) -> None:
+        all_real_genes = [[float(i)] for i in range(100)]
+        with ThreadPoolEvaluator(n_workers=4, chunk_size=7) as evaluator:
+            assert evaluator.evaluate_all(first_gene, all_real_genes) == [float(i) for i in range(100)]
+
+    def test_thread_pool_reused(self) -> None:
+        with ThreadPoolEvaluator(n_workers=2) as evaluator:
+            evaluator.evaluate_all(first_gene, [[1.0], [2.0]])
+            pool = evaluator.pool
+            evaluator.evaluate_all(first_gene, [[1.0], [2.0]])
+            assert evaluator.pool is pool
+        assert evaluator.pool is None
+
+    def test_process_pool_order(self) -> None:
+        all_real_genes = [[float(i)] for i in range(50)]
+        with ProcessPoolEvaluator(n_workers=2, chunk_size=8) as evaluator:
+            assert evaluator.evaluate_all(first_gene, all_real_genes) == [float(i) for i in range(50)]
+
+    def test_thread_pool_batch(self) -> None:
+        np = pytest.importorskip("numpy")
+        calls = []
+        def f(inputs):
+            calls.append(len(inputs))
+            return inputs[:, 0]
+
+        with ThreadPoolEvaluator(n_workers=2, chunk_size=10) as evaluator:
+            all_fit = evaluator.evaluate_all(f, [[float(i)] for i in range(25)], batch=True)
+        assert all_fit == [float(i) for i in range(25)]
+        assert sorted(calls) == [5, 10, 10]
+
+
+class TestSharedMemoryEvaluator:
+
+    def test_order(self) -> None:
+        pytest.importorskip("numpy")
+        all_real_genes = [[float(i)] + [0.0]*99 for i in range(50)]
+        with SharedMemoryEvaluator(n_workers=2, chunk_size=8) as evaluator:
+            assert evaluator.evaluate_all(first_gene, all_real_genes) == [float(i) for i in range(50)]
+
+    def test_memory_reused_and_grown(self) -> None:
+        pytest.importorskip("numpy")
+        with SharedMemoryEvaluator(n_workers=2) as evaluator:
+            evaluator.evaluate_all(first_gene, [[1.0, 2.0]]*20)
+            genes_name = evaluator.genes_memory.name
+            assert evaluator.evaluate_all(first_gene, [[3.0, 2.0]]*10) == [3.0]*10
+            assert evaluator.genes_memory.name == genes_name
+            assert evaluator.evaluate_all(first_gene, [[4.0, 2.0]]*30) == [4.0]*30
+            assert evaluator.genes_memory.name != genes_name
+        assert evaluator.genes_memory is None and evaluator.pool is None
+
+    def test_batch(self) -> None:
+        np = pytest.importorskip("numpy")
+        all_real_genes = np.arange(60, dtype=float).reshape(20, 3)
+        with SharedMemoryEvaluator(n_workers=2, chunk_size=6) as evaluator:
+            assert evaluator.evaluate_all(last_column, all_real_genes, batch=True) == all_real_genes[:, -1].tolist()
+
+    def test_population_evolve(self) -> None:
+        pytest.importorskip("numpy")
+        my_pop = Population(50, 30, sum, engine="matrix")
+        my_pop.log["print"] = False
+        with SharedMemoryEvaluator(n_workers=2) as evaluator:
+            my_pop.set_models(evaluator=evaluator)
+            fit, real_genes, _ = my_pop.evolve(5, target=-1.0)
+        assert round(fit, 9) == round(sum(real_genes), 9)
+
+
+class TestAsyncEvaluator:
+
+    def test_order_and_limit(self) -> None:
+        running = {"now": 0, "max": 0}
+        async def f(inputs: List[float]) -> float:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+            await asyncio.sleep(0.001 * (10 - inputs[0]))
+            running["now"] -= 1
+            return inputs[0]
+
+        with AsyncEvaluator(limit=3) as evaluator:
+            assert evaluator.evaluate_all(f, [[float(i)] for i in range(10)]) == [float(i) for i in range(10)]
+            assert evaluator.evaluate_all(f, [[1.0]]) == [1.0]
+        assert running["max"] == 3
+
+    def test_population_evolve(self) -> None:
+        async def f(inputs: List[float]) -> float:
+            await asyncio.sleep(0)
+            return sum(inputs)
+
+        my_pop = Population(2, 30, f)
+        my_pop.log["print"] = False
+        with AsyncEvaluator(limit=5) as evaluator:
+            my_pop.set_models(evaluator=evaluator)
+            fit, real_genes, _ = my_pop.evolve(10, target=-1.0)
+        assert fit == sum(real_genes)
+
+
+def test_population_with_thread_pool() -> None:
+    my_pop = Population(2, 30, first_gene)
+    with ThreadPoolEvaluator(n_workers=3) as evaluator:
+        my_pop.set_models(evaluator=evaluator)
+        my_pop.calculate_all_fitness(my_pop.pop)
+    assert all([ind.fit() == ind.gene(0) for ind in my_pop.pop])
+    assert my_pop.pop[0].fit() == min([ind.gene(0) for ind in my_pop.pop])
@@ -81,3 +81,53 @@ class TestIndividual:
         bar = Individual(3)
         bar.set_fit_value(1.0)
         assert foo > bar
+
+
+class TestCompactIndividual:
+
+    def test_require_update(self) -> None:
+        individual_example = CompactIndividual(3)
+        assert individual_example.require_update() == True
+        individual_example.set_fit_value(1.0)
+        assert individual_example.require_update() == False
+
+    def test_gene_manipulation(self) -> None:
+        individual_example = CompactIndividual(3)
+        individual_example.set_all_genes([0.1, 2.0, -0.3])
+        assert individual_example.genes() == [0.1, 1.0, 0.0]
+        individual_example.set_new_gene_value(0, 0.5)
+        assert individual_example.gene(0) == 0.5
+
+    def test_wrong_size_of_genes(self) -> None:
+        with pytest.raises(Exception):
+            CompactIndividual(3).set_all_genes([0.1, 0.2, 0.3, 0.4])
+
+    def test_genes_view_is_read_only(self) -> None:
+        individual_example = CompactIndividual(3, list_of_genes=[0.1, 0.2, 0.3])
+        view = individual_example.genes_view()
+        with pytest.raises(TypeError):
+            view[0] = 0.5
+        individual_example.set_new_gene_value(0, 0.5)
+        assert view[0] == 0.5
+
+    def test_no_instance_dict(self) -> None:
+        with pytest.raises(AttributeError):
+            CompactIndividual(3).__dict__
+
+    def test_real_genes_cache(self) -> None:
+        from genetic_algorithm.range import LinearRange
+        range_dict = {i: LinearRange(0.0, 10.0) for i in range(2)}
+        individual_example = CompactIndividual(2, list_of_genes=[0.1, 0.2])
+        real_genes = individual_example.real_genes(range_dict)
+        assert [round(r, 6) for r in real_genes] == [1.0, 2.0]
+        assert individual_example.real_genes(range_dict) is real_genes
+        individual_example.set_new_gene_value(0, 0.5)
+        assert round(individual_example.real_genes(range_dict)[0], 6) == 5.0
+
+    def test_compare_with_individual(self) -> None:
+        foo = CompactIndividual(3)
+        foo.set_fit_value(1.0)
+        bar = Individual(3)
+        bar.set_fit_value(2.0)
+        assert foo < bar
+        assert bar > foo
@@ -0,0 +1,105 @@
+import pytest
+from genetic_algorithm.population import Population
+from genetic_algorithm.island import Island, IslandModel
+from genetic_algorithm.crossover import SBXCrossover
+from genetic_algorithm.range import LinearRange
+
+
+def sphere(x):
+    return sum([g**2 for g in x])
+
+
+def sphere_population(index: int) -> Population:
+    my_pop = Population(4, 20, sphere)
+    my_pop.log["print"] = False
+    my_pop.set_range_from_dict({i: LinearRange(-5.0, 5.0) for i in range(4)})
+    if index % 2:
+        my_pop.set_models(crossover=SBXCrossover())
+    return my_pop
+
+
+def failing_population(index: int) -> Population:
+    raise ValueError("island failure")
+
+
+def test_island_keeps_generations() -> None:
+    island = Island(sphere_population(0), max_generations=25)
+    genes, fit, best, done = island.run(10, None, 3)
+    assert island.cur_gen == 10 and not done
+    assert len(genes) == 3 and fit == sorted(fit) and best == fit[0]
+    island.run(100, None, 3)
+    assert island.cur_gen == 25 and island.done
+
+
+def test_replace_worst() -> None:
+    my_pop = sphere_population(0)
+    my_pop.calculate_all_fitness(my_pop.pop)
+    my_pop.replace_worst([[0.5]*4], [-1.0])
+    assert my_pop.pop[0].fit() == -1.0
+    assert my_pop.pop[0].genes() == [0.5]*4
+    assert len(my_pop.pop) == 20
+
+
+@pytest.mark.parametrize("engine", ["individual", "matrix"])
+def test_best_and_worst_of_an_unsorted_population(engine: str) -> None:
+    if engine == "matrix":
+        pytest.importorskip("numpy")
+    my_pop = Population(1, 6, sum, engine=engine)
+    my_pop.calculate_all_fitness(my_pop.pop)
+    for i, fit in enumerate([0.0, 5.0, 1.0, 4.0, 2.0, 3.0]):
+        ind = my_pop.pop[i]
+        ind.set_fit_value(fit)
+        my_pop.pop[i] = ind
+    assert my_pop.get_best(3)[1] == [0.0, 1.0, 2.0]
+    my_pop.replace_worst([[0.5], [0.5]], [-1.0, 10.0])
+    fit_values = [ind.fit() for ind in my_pop.pop]
+    assert fit_values[0] == -1.0
+    assert sorted(fit_values) == [-1.0, 0.0, 1.0, 2.0, 3.0, 10.0]
+
+
+def test_ring_migrants() -> None:
+    model = IslandModel(sphere_population, n_islands=3, topology="ring")
+    reports = [([[float(i)]], [float(i)], float(i), False) for i in range(3)]
+    assert model.get_migrants(reports) == [([[2.0]], [2.0]), ([[0.0]], [0.0]), ([[1.0]], [1.0])]
+
+
+def test_full_migrants() -> None:
+    model = IslandModel(sphere_population, n_islands=3, topology="full")
+    reports = [([[float(i)]], [float(i)], float(i), False) for i in range(3)]
+    assert model.get_migrants(reports)[0] == ([[1.0], [2.0]], [1.0, 2.0])
+
+
+def test_unknown_topology() -> None:
+    with pytest.raises(Exception):
+        IslandModel(sphere_population, topology="star")
+
+
+def test_local_islands() -> None:
+    model = IslandModel(sphere_population, n_islands=3, migration_interval=10, use_processes=False)
+    fit, real_genes, genes = model.evolve(50, target=-1.0)
+    assert len(model.results) == 3
+    assert fit == min([r[0] for r in model.results])
+    assert round(fit, 6) == round(sphere(real_genes), 6)
+
+
+def test_process_islands() -> None:
+    model = IslandModel(sphere_population, n_islands=2, migration_interval=20, topology="full")
+    fit, real_genes, _ = model.evolve(200, target=1e-3)
+    assert len(model.results) == 2
+    assert fit <= 1.0
+    assert round(fit, 6) == round(sphere(real_genes), 6)
+
+
+def test_process_island_error() -> None:
+    model = IslandModel(failing_population, n_islands=2)
+    with pytest.raises(ValueError):
+        model.evolve(10)
+
+
+def test_seeded_islands_are_reproducible() -> None:
+    results = []
+    for use_processes in (True, False):
+        model = IslandModel(sphere_population, n_islands=2, migration_interval=10, use_processes=use_processes, seed=3)
+        model.evolve(30, target=-1.0)
+        results.append([(fit, list(real_genes)) for fit, real_genes, _ in model.results])
+    assert results[0] == results[1]
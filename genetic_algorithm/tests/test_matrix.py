@@ -0,0 +1,101 @@
+import pytest
+from typing import List
+np = pytest.importorskip("numpy")
+from genetic_algorithm.population import *
+from genetic_algorithm.utils import k_tournament_matrix
+
+
+class TestPopulationMatrix:
+
+    def test_random_shape_and_bounds(self) -> None:
+        pop = PopulationMatrix.random(50, 4)
+        assert pop.genes.shape == (50, 4)
+        assert pop.genes.min() >= 0.0 and pop.genes.max() <= 1.0
+        assert pop.require_update.all()
+
+    def test_get_and_set_individual(self) -> None:
+        pop = PopulationMatrix.random(5, 3)
+        ind = Individual(3, list_of_genes=[0.1, 0.2, 0.3])
+        ind.set_fit_value(2.0)
+        pop[1] = ind
+        assert pop[1].genes() == [0.1, 0.2, 0.3]
+        assert pop[1].fit() == 2.0
+        assert pop[0].require_update() == True
+
+    def test_sort(self) -> None:
+        pop = PopulationMatrix.random(3, 2)
+        pop.set_fit_values(np.arange(3), [3.0, 1.0, 2.0])
+        first = pop.genes[1].copy()
+        pop.sort()
+        assert pop.fit_values.tolist() == [1.0, 2.0, 3.0]
+        assert (pop.genes[0] == first).all()
+
+    def test_merge(self) -> None:
+        pop_1, pop_2 = PopulationMatrix.random(3, 2), PopulationMatrix.random(2, 2)
+        pop_1.set_fit_values(np.arange(3), [1.0, 2.0, 3.0])
+        index = np.array([4, 0, 2])
+        merged = pop_1.merge(pop_2, index)
+        expected = pop_1.concatenate(pop_2).take(index)
+        assert (merged.genes == expected.genes).all()
+        assert merged.fit_values.tolist() == expected.fit_values.tolist()
+        assert merged.require_update.tolist() == [True, False, False]
+
+
+class TestMatrixOperators:
+
+    def test_k_tournament_matrix(self) -> None:
+        fit = np.arange(100, dtype=float)
+        champions = k_tournament_matrix(2, 200, fit)
+        assert len(champions) == 200
+        # with k=2 and no replacement, the worst individual never wins
+        assert 99 not in champions
+
+    def test_random_crossover_matrix(self) -> None:
+        parents = np.array([[0.0, 0.0, 0.0], [1.0, 1.0, 1.0]])
+        children = RandomCrossover(children_ratio=1.0).generate_all_offspring_matrix(parents, np.array([[0, 1]] * 10))
+        assert children.shape == (20, 3)
+        assert ((children[0::2] + children[1::2]) == 1.0).all()
+        # at least one gene is kept from the first parent
+        assert (children[0::2] == 0.0).any(axis=1).all()
+
+    def test_all_random_matrix_bounds(self) -> None:
+        genes = np.full((100, 10), 0.99)
+        rows = AllRandom(ind_mut_chance=1.0, gen_mut_chance=1.0, mut_range=1.0).mutate_all_matrix(genes)
+        assert len(rows) == 100
+        assert genes.max() <= 1.0 and genes.min() >= 0.0
+
+    def test_best_individual_selector_matrix(self) -> None:
+        selected = BestIndividualSelector().select_population_matrix(2, np.array([3.0, 1.0]), np.array([0.5, 4.0]))
+        assert selected.tolist() == [2, 1]
+
+
+def test_matrix_engine_evolve() -> None:
+    def f(inputs: List[float]) -> float:
+        x, y = inputs
+        return 2*x**2 - 1.05*x**4 + (1/6)*x**6 + x*y + y**2
+
+    # seeded, so the run is the same every time (without a seed a few runs stall in the local minimum)
+    my_pop = Population(2, 100, f, engine="matrix", seed=0)
+    my_pop.set_range_from_dict({0:LinearRange(-10.0, 10.0), 1:LinearRange(-10.0, 10.0)})
+    my_pop.log["print"] = False
+    fit, real_genes, genes = my_pop.evolve(1000, target=0.001)
+    assert fit <= 0.001
+    assert len(real_genes) == 2 and len(genes) == 2
+
+
+def test_matrix_engine_batch_fitness() -> None:
+    calls = []
+    def f(inputs):
+        calls.append(len(inputs))
+        return np.abs(inputs).sum(axis=1)
+
+    my_pop = Population(2, 50, f, engine="matrix", batch_fitness=True)
+    my_pop.log["print"] = False
+    fit, _, _ = my_pop.evolve(5, target=-1.0)
+    assert len(calls) == 6
+    assert fit == my_pop.pop.fit_values.min()
+
+
+def test_unknown_engine() -> None:
+    with pytest.raises(Exception):
+        Population(2, 10, None, engine="foo")
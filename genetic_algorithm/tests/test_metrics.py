@@ -0,0 +1,53 @@
+import pytest
+import urllib.request
+import urllib.error
+from genetic_algorithm.population import Population
+from genetic_algorithm.cache import FitnessCache
+from genetic_algorithm.metrics import MetricsExporter
+
+
+def scrape(exporter: MetricsExporter, path: str = "/metrics") -> str:
+    host, port = exporter.address
+    with urllib.request.urlopen(f"http://{host}:{port}{path}", timeout=5.0) as response:
+        return response.read().decode("utf-8")
+
+
+def test_metrics_before_evolution() -> None:
+    with MetricsExporter() as exporter:
+        assert scrape(exporter) == "\n"
+
+
+def test_metrics_not_found() -> None:
+    with MetricsExporter() as exporter:
+        with pytest.raises(urllib.error.HTTPError):
+            scrape(exporter, "/other")
+
+
+def test_metrics_of_evolution() -> None:
+    my_pop = Population(3, 30, sum)
+    my_pop.log["print"] = False
+    my_pop.set_models(cache=FitnessCache())
+    with MetricsExporter(update_interval=0.0) as exporter:
+        my_pop.add_generation_callback(exporter)
+        my_pop.evolve(10, target=-1.0)
+        text = scrape(exporter)
+
+    values = {line.split(" ")[0]: float(line.split(" ")[1]) for line in text.splitlines() if not line.startswith("#")}
+    assert values["ga_generation"] == 10.0
+    assert values["ga_evaluations_total"] == my_pop.evaluations["total"]
+    assert values["ga_best_fitness"] == my_pop.pop[0].fit()
+    # when the population converges to a single individual, the mean can be below the best by a rounding error
+    assert values["ga_best_fitness"] <= values["ga_mean_fitness"] or values["ga_best_fitness"] == pytest.approx(values["ga_mean_fitness"])
+    assert 0.0 <= values["ga_cache_hit_rate"] <= 1.0
+    assert values["ga_generations_per_second"] > 0.0
+    assert 'ga_stage_seconds_total{stage="crossover"}' in values
+    assert "# TYPE ga_evaluations_total counter" in text
+
+
+def test_update_interval() -> None:
+    my_pop = Population(3, 30, sum)
+    my_pop.log["print"] = False
+    with MetricsExporter(update_interval=3600.0) as exporter:
+        my_pop.add_generation_callback(exporter)
+        my_pop.evolve(5, target=-1.0)
+        assert exporter.snapshot["generation"] == 1
@@ -0,0 +1,62 @@
+import pytest
+from genetic_algorithm.mutator import *
+from genetic_algorithm.individual import Individual
+
+
+class TestAllRandom:
+
+    def test_no_mutation(self) -> None:
+        pop = [Individual(5, list_of_genes=[0.5]*5) for _ in range(20)]
+        AllRandom(ind_mut_chance=0.0).mutate_all_individuals(pop)
+        assert all([ind.genes() == [0.5]*5 for ind in pop])
+
+    def test_mutation_range_and_bounds(self) -> None:
+        pop = [Individual(50, list_of_genes=[0.99]*50) for _ in range(20)]
+        AllRandom(ind_mut_chance=1.0, gen_mut_chance=1.0, mut_range=0.1).mutate_all_individuals(pop)
+        all_genes = [g for ind in pop for g in ind.genes()]
+        assert max(all_genes) <= 1.0
+        assert min(all_genes) >= 0.99 - 0.05
+        assert all([ind.require_update() for ind in pop])
+
+    def test_custom_random_fun(self) -> None:
+        pop = [Individual(3, list_of_genes=[0.5]*3)]
+        AllRandom(ind_mut_chance=1.0, gen_mut_chance=1.0, mut_range=0.1, random_generation_fun=lambda: 1.0).mutate_all_individuals(pop)
+        assert [round(g, 6) for g in pop[0].genes()] == [0.55]*3
+
+    def test_gen_mut_chance(self) -> None:
+        np = pytest.importorskip("numpy")
+        genes = np.full((1000, 100), 0.5)
+        mutated = all_random_kernel(genes, 0.1, 0.1)
+        assert 0.08 < (mutated != 0.5).mean() < 0.12
+        assert (genes == 0.5).all()
+
+
+class TestSparseRandom:
+
+    def test_sample_sparse_indexes(self) -> None:
+        from genetic_algorithm.utils import sample_sparse_indexes
+        indexes = sample_sparse_indexes(100000, 0.1)
+        assert indexes == sorted(set(indexes))
+        assert 9000 < len(indexes) < 11000
+        assert sample_sparse_indexes(10, 0.0) == []
+        assert sample_sparse_indexes(10, 1.0) == list(range(10))
+
+    def test_last_changes(self) -> None:
+        pop = [Individual(1000, list_of_genes=[0.5]*1000) for _ in range(10)]
+        mutator = SparseRandom(ind_mut_chance=1.0, gen_mut_chance=0.01)
+        mutator.mutate_all_individuals(pop)
+        assert len(mutator.last_changes) > 0
+        for i, changed in mutator.last_changes:
+            genes = pop[i].genes()
+            assert set(changed) == {g for g in range(1000) if genes[g] != 0.5}
+
+    def test_matrix_last_changes(self) -> None:
+        np = pytest.importorskip("numpy")
+        genes = np.full((100, 1000), 0.5)
+        mutator = SparseRandom(ind_mut_chance=0.5, gen_mut_chance=0.01)
+        mutator.mutate_all_matrix(genes)
+        rows, cols = mutator.last_changes
+        expected = np.zeros(genes.shape, dtype=bool)
+        expected[rows, cols] = True
+        assert ((genes != 0.5) == expected).all()
+        assert genes.min() >= 0.45 and genes.max() <= 0.55
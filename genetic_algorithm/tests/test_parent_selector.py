@@ -0,0 +1,33 @@
+import pytest
+from genetic_algorithm.parent_selector import *
+from genetic_algorithm.individual import Individual
+from genetic_algorithm.utils import fast_k_tournament
+
+
+class TestFastKTournament:
+
+    def test_number_of_champions(self) -> None:
+        assert len(fast_k_tournament(2, 250, [float(i) for i in range(100)])) == 250
+
+    def test_without_replacement(self) -> None:
+        # with k=2 and no replacement, the worst individual never wins
+        champions = fast_k_tournament(2, 1000, [float(i) for i in range(101)])
+        assert 100 not in champions
+        assert min(champions) >= 0
+
+    def test_with_replacement(self) -> None:
+        champions = fast_k_tournament(3, 1000, [float(i) for i in range(10)], replacement=True)
+        assert len(champions) == 1000
+        assert max(champions) <= 9
+
+    def test_k_larger_than_population(self) -> None:
+        assert fast_k_tournament(5, 4, [3.0, 1.0, 2.0]) == [1, 1, 1, 1]
+
+
+def test_k_tournament_parent_selector() -> None:
+    parents = [Individual(2) for _ in range(20)]
+    for i, ind in enumerate(parents):
+        ind.set_fit_value(float(i))
+    parents_pair = KTournamentParentSelector(k=2).select_all_parents(parents)
+    assert 0 < len(parents_pair) <= 20
+    assert all([p_1 != p_2 for p_1, p_2 in parents_pair])
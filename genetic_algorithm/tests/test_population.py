@@ -20,7 +20,7 @@ def test_save_1(tmp_path):
 
     f = open(log_file, "r")
     aux = f.read()
-    assert aux[-19:] == "0.12345,0.23456,0.0"
+    assert aux[-20:] == "0.12345,0.23456,0.0\n"
 
 def test_load_1(tmp_path):
     log_file = tmp_path / "mydir/log_file.txt"
@@ -99,6 +99,43 @@ def test_load_4(tmp_path):
     aux[2] = round(aux[2],5)
     assert aux == [1.1, 1.23456, 0.56790]
 
+def test_batch_fitness_one_call_per_generation() -> None:
+    np = pytest.importorskip("numpy")
+    calls = []
+    def f(inputs):
+        calls.append(inputs.shape)
+        return (inputs**2).sum(axis=1)
+
+    my_pop = Population(3, 20, f, batch_fitness=True)
+    my_pop.calculate_all_fitness(my_pop.pop)
+    assert calls == [(20, 3)]
+    assert all([ind.require_update() == False for ind in my_pop.pop])
+    assert my_pop.pop[0].fit() <= my_pop.pop[-1].fit()
+
+def test_batch_fitness_wrong_shape() -> None:
+    np = pytest.importorskip("numpy")
+    my_pop = Population(3, 20, lambda x: x.sum(), batch_fitness=True)
+    with pytest.raises(Exception):
+        my_pop.calculate_all_fitness(my_pop.pop)
+
+def test_only_changed_individuals_are_evaluated() -> None:
+    my_pop = Population(3, 30, sum)
+    my_pop.calculate_all_fitness(my_pop.pop)
+    assert my_pop.evaluations["total"] == 30
+
+    my_pop.pop[-1].randomize_genes()
+    my_pop.calculate_all_fitness(my_pop.pop)
+    assert my_pop.evaluations["total"] == 31
+
+def test_evaluations_per_generation() -> None:
+    my_pop = Population(3, 30, sum)
+    my_pop.log["print"] = False
+    my_pop.set_models(stall=GenerationStallControl(num_of_generations=1000))
+    my_pop.evolve(1, target=-1.0)
+    # only the children are evaluated
+    assert 0 < my_pop.evaluations["last_generation"] <= 2*round(0.7*30)
+    assert my_pop.evaluations["total"] == 30 + my_pop.evaluations["last_generation"]
+
 
 class TestBenchmark:
     """
@@ -225,4 +262,113 @@ class TestBenchmark:
         _fit, _, _ = my_pop.evolve(1000, target=0.1)
         fit.append(_fit)
 
-        assert min(fit) <= 1.0
\ No newline at end of file
+        assert min(fit) <= 1.0
+
+
+def test_compact_individual_population() -> None:
+    from genetic_algorithm.individual import CompactIndividual
+    my_pop = Population(3, 30, sum, individual_class=CompactIndividual)
+    my_pop.log["print"] = False
+    fit, real_genes, _ = my_pop.evolve(5, target=-1.0)
+    assert all([isinstance(ind, CompactIndividual) for ind in my_pop.pop])
+    assert fit == sum(real_genes)
+
+
+def test_compact_individual_loaded_from_log(tmp_path) -> None:
+    from genetic_algorithm.individual import CompactIndividual
+    log_file = tmp_path / "log_file.txt"
+    log_file.write_text("fit:0.01      ,real_gen:0.1,0.2,0.3\n")
+    my_pop = Population(3, 30, sum, individual_class=CompactIndividual)
+    my_pop.log["print"] = False
+    my_pop.set_log_file(str(log_file))
+    my_pop.init_log()
+    assert {type(ind) for ind in my_pop.pop} == {CompactIndividual}
+    assert my_pop.pop[0].genes() == pytest.approx([0.1, 0.2, 0.3])
+    my_pop.evolve(5, target=-1.0)
+    assert {type(ind) for ind in my_pop.pop} == {CompactIndividual}
+
+
+def test_compact_individual_real_genes_are_reused() -> None:
+    from genetic_algorithm.individual import CompactIndividual
+    inputs = []
+    def f(real_genes):
+        inputs.append(real_genes)
+        return sum(real_genes)
+
+    my_pop = Population(3, 10, f, individual_class=CompactIndividual)
+    my_pop.calculate_all_fitness(my_pop.pop)
+    # the fitness function receives the real genes cached by the individuals
+    assert {id(ind.real_genes(my_pop.get_range_dict())) for ind in my_pop.pop} == {id(x) for x in inputs}
+
+
+def test_range_decoder_is_recompiled() -> None:
+    pytest.importorskip("numpy")
+    from genetic_algorithm.range import ExponentialRange
+    my_pop = Population(2, 10, sum)
+    decoder = my_pop.get_decoder()
+    assert my_pop.get_decoder() is decoder
+    my_pop.set_range_from_dict({1: ExponentialRange(0.0, 2.0)})
+    assert my_pop.get_decoder() is not decoder
+    assert my_pop.decode_genes([[0.5, 0.5]]) == [[0.5, 10.0]]
+    assert [round(g, 6) for g in my_pop.get_genes_from_real([0.25, 100.0])] == [0.25, 1.0]
+
+def test_stage_timers_and_callbacks() -> None:
+    all_stats = []
+    my_pop = Population(3, 30, sum)
+    my_pop.log["print"] = False
+    my_pop.add_generation_callback(lambda pop, stats: all_stats.append(stats))
+    my_pop.evolve(5, target=-1.0)
+
+    assert [stats["generation"] for stats in all_stats] == [1, 2, 3, 4, 5]
+    assert all_stats[-1]["evaluations"] == my_pop.evaluations
+    assert all_stats[-1]["best_fit"] == my_pop.pop[0].fit()
+    assert set(my_pop.timers["total"]) == set(Population.STAGES)
+    assert my_pop.timers["total"]["evaluate"] > 0.0
+    total = sum([stats["timers"]["last_generation"]["crossover"] for stats in all_stats])
+    assert round(total, 9) == round(my_pop.timers["total"]["crossover"], 9)
+
+
+@pytest.mark.parametrize("engine", ["individual", "matrix"])
+def test_seed_is_reproducible(engine: str) -> None:
+    if engine == "matrix":
+        pytest.importorskip("numpy")
+    from genetic_algorithm.mutator import SparseRandom
+    results = []
+    for seed in (5, 5, 6):
+        my_pop = Population(4, 30, sum, engine=engine, seed=seed)
+        my_pop.log["print"] = False
+        my_pop.set_models(mutator=SparseRandom(ind_mut_chance=0.5, gen_mut_chance=0.5))
+        fit, real_genes, _ = my_pop.evolve(3, target=-1.0)
+        results.append((fit, list(real_genes)))
+    assert results[0] == results[1]
+    assert results[0] != results[2]
+
+
+def test_set_seed_draws_a_new_population() -> None:
+    my_pop = Population(3, 10, sum)
+    my_pop.set_seed(1)
+    genes = [ind.genes() for ind in my_pop.pop]
+    my_pop.set_seed(1)
+    assert [ind.genes() for ind in my_pop.pop] == genes
+    crossover = RandomCrossover()
+    my_pop.set_models(crossover=crossover)
+    assert crossover.rng is my_pop.streams.stream("crossover")
+
+
+def test_random_seed_repeats_unseeded_population() -> None:
+    import random
+    populations = []
+    for _ in range(2):
+        random.seed(0)
+        populations.append([ind.genes() for ind in Population(3, 5, sum).pop])
+    assert populations[0] == populations[1]
+
+
+@pytest.mark.parametrize("engine", ["individual", "matrix"])
+def test_evolve_returns_lists(engine: str) -> None:
+    np = pytest.importorskip("numpy")
+    my_pop = Population(3, 10, lambda x: x.sum(axis=1), engine=engine, batch_fitness=True)
+    my_pop.log["print"] = False
+    fit, real_genes, genes = my_pop.evolve(2, target=-1.0)
+    assert type(real_genes) is list and type(genes) is list
+    assert fit == pytest.approx(sum(real_genes))
@@ -0,0 +1,34 @@
+import pytest
+from typing import List
+from genetic_algorithm.population_selector import *
+from genetic_algorithm.individual import Individual
+
+
+def create_pop(all_fit: List[float]) -> List[Individual]:
+    pop = [Individual(2) for _ in all_fit]
+    for ind, fit in zip(pop, all_fit):
+        ind.set_fit_value(fit)
+    return pop
+
+
+class TestPartialBestIndividualSelector:
+
+    def test_sorted_elite(self) -> None:
+        new_pop = PartialBestIndividualSelector().select_population(3, create_pop([5.0, 1.0, 4.0]), create_pop([0.5, 3.0, 2.0]))
+        assert [ind.fit() for ind in new_pop] == [0.5, 1.0, 2.0]
+
+    def test_same_as_best_individual_selector(self) -> None:
+        pop_1, pop_2 = create_pop([float(i % 7) for i in range(30)]), create_pop([float(i % 5) for i in range(20)])
+        expected = BestIndividualSelector().select_population(30, pop_1, pop_2)
+        new_pop = PartialBestIndividualSelector().select_population(30, pop_1, pop_2)
+        assert [ind.fit() for ind in new_pop] == [ind.fit() for ind in expected]
+
+    def test_unsorted_elite(self) -> None:
+        new_pop = PartialBestIndividualSelector(sort_elite=False).select_population(3, create_pop([5.0, 1.0, 4.0]), create_pop([0.5, 3.0, 2.0]))
+        assert new_pop[0].fit() == 0.5
+        assert sorted([ind.fit() for ind in new_pop]) == [0.5, 1.0, 2.0]
+
+    def test_matrix(self) -> None:
+        np = pytest.importorskip("numpy")
+        selected = PartialBestIndividualSelector().select_population_matrix(3, np.array([5.0, 1.0, 4.0]), np.array([0.5, 3.0, 2.0]))
+        assert selected.tolist() == [3, 1, 5]
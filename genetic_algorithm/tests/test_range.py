@@ -1,5 +1,6 @@
 import pytest
 from genetic_algorithm.range import *
+from typing import Dict
 import math
 
 class TestLinearRange:
@@ -188,4 +189,54 @@ class TestNegativeExponentialRange:
         aux_gen = 0.5
         real = math.pow(test_base, aux_gen)
         nexp = NegativeExponentialRange(0.0, 1.0, base=test_base)
-        assert round(nexp.get_gene_from_real(real), 2) == round(0.75, 2)
\ No newline at end of file
+        assert round(nexp.get_gene_from_real(real), 2) == round(0.75, 2)
+
+class HalfRange(BaseRange):
+    def get_real_from_gene(self, gene_value: float) -> float:
+        return gene_value / 2
+
+    def get_gene_from_real(self, real_value: float) -> float:
+        return real_value * 2
+
+
+class TestRangeDecoder:
+    def get_range_dict(self) -> Dict[int, BaseRange]:
+        return {0: LinearRange(-5.0, 5.0),
+                1: ExponentialRange(-2.0, 2.0),
+                2: NegativeExponentialRange(-3.0, 1.0, base=2.0),
+                3: LinearRange(1.0, 0.0),
+                4: HalfRange(),
+                5: ExponentialRange(0.0, 3.0, base=3.0)}
+
+    def test_decode_matches_get_real_from_genes(self) -> None:
+        np = pytest.importorskip("numpy")
+        range_dict = self.get_range_dict()
+        genes = np.random.default_rng(1).uniform(0.0, 1.0, (20, 6))
+        real = RangeDecoder(range_dict, 6).decode(genes)
+        expected = [get_real_from_genes(row, range_dict) for row in genes.tolist()]
+        assert real.shape == (20, 6)
+        assert np.allclose(real, expected)
+
+    def test_encode_is_inverse_of_decode(self) -> None:
+        np = pytest.importorskip("numpy")
+        decoder = RangeDecoder(self.get_range_dict(), 6)
+        genes = np.random.default_rng(2).uniform(0.0, 1.0, (20, 6))
+        assert np.allclose(decoder.encode(decoder.decode(genes)), genes)
+
+    def test_encode_matches_get_genes_from_real(self) -> None:
+        pytest.importorskip("numpy")
+        range_dict = self.get_range_dict()
+        real = [1.0, 10.0, -0.5, 0.25, 0.2, 9.0]
+        genes = RangeDecoder(range_dict, 6).encode([real])[0]
+        assert [round(g, 6) for g in genes] == [round(g, 6) for g in get_genes_from_real(real, range_dict)]
+
+    def test_encode_zero_negative_exponential(self) -> None:
+        pytest.importorskip("numpy")
+        with pytest.raises(Exception):
+            RangeDecoder({0: NegativeExponentialRange(0.0, 1.0)}, 1).encode([[0.0]])
+
+    def test_get_real_matrix_from_genes(self) -> None:
+        np = pytest.importorskip("numpy")
+        range_dict = {0: LinearRange(0.0, 10.0), 1: ExponentialRange(0.0, 1.0)}
+        real = get_real_matrix_from_genes(np.array([[0.5, 1.0], [0.0, 0.0]]), range_dict)
+        assert np.allclose(real, [[5.0, 10.0], [0.0, 1.0]])
@@ -0,0 +1,54 @@
+import pytest
+from genetic_algorithm.rng import RandomStream, RandomStreams, derive_seed
+
+
+def test_same_seed_same_numbers() -> None:
+    first, second = RandomStreams(3), RandomStreams(3)
+    assert first.stream("crossover").numbers(5) == second.stream("crossover").numbers(5)
+    assert first.stream("mutator").number() == second.stream("mutator").number()
+
+
+def test_streams_do_not_depend_on_the_order() -> None:
+    first, second = RandomStreams(3), RandomStreams(3)
+    first.stream("crossover").numbers(10)
+    assert first.stream("mutator").numbers(3) == second.stream("mutator").numbers(3)
+    assert RandomStreams(3).stream("crossover").numbers(3) != RandomStreams(3).stream("mutator").numbers(3)
+
+
+def test_derive_seed() -> None:
+    assert derive_seed(1, "island_0") == RandomStreams(1).derive_seed("island_0")
+    assert derive_seed(1, "island_0") != derive_seed(1, "island_1")
+    assert derive_seed(1, "island_0") != derive_seed(2, "island_0")
+    assert 0 <= derive_seed(1, "island_0") < 2**64
+
+
+def test_unseeded_streams_keep_the_seed() -> None:
+    streams = RandomStreams()
+    assert streams.stream("stall").numbers(3) == RandomStreams(streams.seed).stream("stall").numbers(3)
+
+
+def test_bulk_draws() -> None:
+    stream = RandomStream(5)
+    values = stream.uniform_list(100, 2.0, 3.0)
+    assert len(values) == 100 and all([2.0 <= v < 3.0 for v in values])
+    assert all([0.0 <= v < 1.0 for v in stream.numbers(100)])
+
+
+def test_matrix_draws() -> None:
+    pytest.importorskip("numpy")
+    stream = RandomStream(5)
+    assert stream.matrix((3, 4)).shape == (3, 4)
+    permutations = stream.permutations(4, 6)
+    assert all([sorted(row) == list(range(6)) for row in permutations.tolist()])
+    assert ((stream.integers(0, 3, (10,)) >= 0) & (stream.integers(0, 3, (10,)) < 3)).all()
+
+
+def test_state() -> None:
+    streams = RandomStreams(11)
+    streams.stream("crossover").numbers(4)
+    state = streams.get_state()
+    expected = (streams.stream("crossover").number(), streams.stream("crossover").numbers(3))
+
+    other = RandomStreams(0)
+    other.set_state(state)
+    assert (other.stream("crossover").number(), other.stream("crossover").numbers(3)) == expected
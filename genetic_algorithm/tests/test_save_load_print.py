@@ -0,0 +1,197 @@
+import pytest
+import json
+from genetic_algorithm.population import *
+from genetic_algorithm.save_load_print import BufferedJSONLog, read_lines_backwards
+
+
+def test_default_log_one_record_per_line(tmp_path) -> None:
+    log_file = tmp_path / "log_file.txt"
+    my_pop = Population(2, 10, None)
+    my_pop.set_log_file(str(log_file))
+    log_file.touch()
+    my_pop.init_log()
+    for fit in (2.0, 1.0):
+        my_pop.pop[0].set_fit_value(fit)
+        my_pop.save_to_log()
+    lines = [line for line in log_file.read_text().split("\n") if line]
+    assert len(lines) == 2 and lines[1].startswith("fit:1.0000e+00")
+
+
+def test_buffered_log_records(tmp_path) -> None:
+    log_file = tmp_path / "log_file.txt"
+    log_file.touch()
+    log = BufferedJSONLog(batch_size=1000, flush_interval=60.0)
+    my_pop = Population(2, 30, sum)
+    my_pop.log["print"] = False
+    my_pop.set_log_file(str(log_file))
+    my_pop.set_models(log=log)
+    fit, real_genes, _ = my_pop.evolve(20, target=-1.0)
+
+    records = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert records
+    assert [r["gen"] for r in records] == sorted([r["gen"] for r in records])
+    assert records[-1]["fit"] == fit
+    assert records[-1]["real_genes"] == real_genes
+
+
+def test_buffered_log_batches(tmp_path) -> None:
+    log_file = tmp_path / "log_file.txt"
+    log = BufferedJSONLog(batch_size=3, flush_interval=60.0)
+    log.init_log([Individual(2)], {"print": False}, {0: LinearRange(0.0, 1.0), 1: LinearRange(0.0, 1.0)})
+    log.config["log_path"] = str(log_file)
+    ind = Individual(2)
+    ind.set_fit_value(1.0)
+    for _ in range(2):
+        log.save_to_log(ind)
+    # below batch_size and flush_interval, nothing is written yet
+    assert not log_file.exists()
+    log.save_to_log(ind)
+    log.flush()
+    assert len(log_file.read_text().splitlines()) == 3
+
+
+def test_buffered_log_flushed_on_error(tmp_path) -> None:
+    log_file = tmp_path / "log_file.txt"
+    log_file.touch()
+    calls = []
+    def fitness(x):
+        calls.append(1)
+        if len(calls) > 100:
+            raise ValueError("stop")
+        return sum(x)
+
+    my_pop = Population(2, 30, fitness)
+    my_pop.log["print"] = False
+    my_pop.set_log_file(str(log_file))
+    my_pop.set_models(log=BufferedJSONLog(flush_interval=60.0))
+    with pytest.raises(ValueError):
+        my_pop.evolve(100)
+    assert len(log_file.read_text().splitlines()) > 0
+
+
+def test_buffered_log_resume_from_log(tmp_path) -> None:
+    log_file = tmp_path / "log_file.txt"
+    log_file.write_text(json.dumps({"gen": 3, "time": 0.0, "fit": 1.0, "real_genes": [0.25, 0.5]}) + "\n")
+    my_pop = Population(2, 10, None)
+    my_pop.set_log_file(str(log_file))
+    my_pop.set_models(log=BufferedJSONLog())
+    my_pop.init_log()
+    assert my_pop.pop[0].genes() == [0.25, 0.5]
+
+
+@pytest.mark.parametrize("block_size", [1, 3, 7, 4096])
+def test_read_lines_backwards(tmp_path, block_size: int) -> None:
+    log_file = tmp_path / "log_file.txt"
+    lines = ["first", "", "a longer second line", "third\r", "última"]
+    log_file.write_bytes("\n".join(lines).encode("utf-8"))
+    assert list(read_lines_backwards(str(log_file), block_size)) == lines[::-1]
+
+
+def test_read_lines_backwards_empty(tmp_path) -> None:
+    log_file = tmp_path / "log_file.txt"
+    log_file.touch()
+    assert list(read_lines_backwards(str(log_file))) == [""]
+
+
+def test_default_log_skips_truncated_entry(tmp_path) -> None:
+    log_file = tmp_path / "log_file.txt"
+    log_file.write_text("\nfit:2.0,real_gen:0.1,0.2,0.3\nfit:1.0,real_gen:0.4,0.5,0.6\nfit:0.5,real_gen:0.7,0.")
+    my_pop = Population(3, 10, None)
+    my_pop.set_log_file(str(log_file))
+    my_pop.init_log()
+    assert [round(g, 6) for g in my_pop.pop[0].genes()] == [0.4, 0.5, 0.6]
+
+
+def test_buffered_log_skips_truncated_entry(tmp_path) -> None:
+    log_file = tmp_path / "log_file.txt"
+    complete = json.dumps({"gen": 3, "time": 0.0, "fit": 1.0, "real_genes": [0.25, 0.5]})
+    log_file.write_text(complete + "\n" + complete[:20])
+    my_pop = Population(2, 10, None)
+    my_pop.set_log_file(str(log_file))
+    my_pop.set_models(log=BufferedJSONLog())
+    my_pop.init_log()
+    assert my_pop.pop[0].genes() == [0.25, 0.5]
+
+
+def test_default_log_loads_last_line_without_new_line(tmp_path) -> None:
+    log_file = tmp_path / "log_file.txt"
+    # format of the logs written before the records ended with a new line
+    log_file.write_text("\nfit:2.0,real_gen:0.1,0.2,0.3\nfit:1.0,real_gen:0.4,0.5,0.6")
+    my_pop = Population(3, 10, None)
+    my_pop.set_log_file(str(log_file))
+    my_pop.init_log()
+    assert [round(g, 6) for g in my_pop.pop[0].genes()] == [0.4, 0.5, 0.6]
+
+
+def test_default_log_records_end_with_new_line(tmp_path) -> None:
+    log_file = tmp_path / "log_file.txt"
+    log_file.write_text("fit:1.0,real_gen:0.4,0.")
+    my_pop = Population(3, 10, None)
+    my_pop.set_log_file(str(log_file))
+    my_pop.init_log()
+    my_pop.pop[0].set_all_genes([0.25, 0.5, 0.75])
+    my_pop.pop[0].set_fit_value(1.0)
+    my_pop.save_to_log()
+    assert log_file.read_text().splitlines()[-1].endswith("real_gen:0.25,0.5,0.75")
+    assert log_file.read_text().endswith("\n")
+
+    other_pop = Population(3, 10, None)
+    other_pop.set_log_file(str(log_file))
+    other_pop.init_log()
+    assert other_pop.pop[0].genes() == [0.25, 0.5, 0.75]
+
+
+def test_buffered_log_close(tmp_path) -> None:
+    log_file = tmp_path / "log_file.txt"
+    log = BufferedJSONLog(batch_size=100, flush_interval=60.0)
+    log.init_log([Individual(2)], {"print": False}, {0: LinearRange(0.0, 1.0), 1: LinearRange(0.0, 1.0)})
+    log.config["log_path"] = str(log_file)
+    ind = Individual(2)
+    ind.set_fit_value(1.0)
+    log.save_to_log(ind)
+    writer = log.writer
+    log.close()
+    assert not writer.is_alive() and log.writer is None
+    assert len(log_file.read_text().splitlines()) == 1
+
+
+def test_buffered_log_write_error(tmp_path) -> None:
+    def fail(pending):
+        raise RuntimeError("write failed")
+
+    log = BufferedJSONLog(batch_size=100, flush_interval=60.0)
+    log.init_log([Individual(2)], {"print": False}, {0: LinearRange(0.0, 1.0), 1: LinearRange(0.0, 1.0)})
+    log.config["log_path"] = str(tmp_path / "log_file.txt")
+    log.write_pending = fail
+    ind = Individual(2)
+    ind.set_fit_value(1.0)
+    log.save_to_log(ind)
+    # the writer thread survives the error, so flush does not wait forever
+    with pytest.raises(RuntimeError):
+        log.flush()
+    assert log.writer.is_alive()
+    log.close()
+
+
+def test_flush_error_does_not_hide_the_evolution_error(tmp_path) -> None:
+    def fail(pending):
+        raise RuntimeError("write failed")
+
+    calls = []
+    def fitness(x):
+        calls.append(1)
+        if len(calls) > 100:
+            raise ValueError("fitness failed")
+        return sum(x)
+
+    log_file = tmp_path / "log_file.txt"
+    log_file.touch()
+    log = BufferedJSONLog(flush_interval=60.0)
+    log.write_pending = fail
+    my_pop = Population(2, 30, fitness)
+    my_pop.log["print"] = False
+    my_pop.set_log_file(str(log_file))
+    my_pop.set_models(log=log)
+    with pytest.raises(ValueError):
+        my_pop.evolve(5)
+    log.close()
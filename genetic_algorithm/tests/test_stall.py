@@ -0,0 +1,117 @@
+import pytest
+from genetic_algorithm.population import Population
+from genetic_algorithm.stall import ConvergenceStallControl, GenerationStallControl
+from genetic_algorithm.individual import Individual
+from genetic_algorithm.population_selector import PartialBestIndividualSelector
+
+
+def constant(x):
+    return 1.0
+
+
+def variance(pop):
+    n_genes = pop[0].get_num_of_genes()
+    total = 0.0
+    for j in range(n_genes):
+        column = [ind.gene(j) for ind in pop]
+        mean = sum(column) / len(column)
+        total += sum([(g - mean)**2 for g in column]) / len(column)
+    return total / n_genes
+
+
+@pytest.mark.parametrize("engine", ["individual", "matrix"])
+def test_stops_without_improvement(engine: str) -> None:
+    if engine == "matrix":
+        pytest.importorskip("numpy")
+    stall = ConvergenceStallControl(window=5, max_restarts=2)
+    my_pop = Population(3, 20, constant, engine=engine, seed=1)
+    my_pop.log["print"] = False
+    my_pop.set_models(stall=stall)
+    my_pop.evolve(1000, target=-1.0)
+    assert stall.restarts == 2
+    assert stall.last_generation == 18
+    assert my_pop.stop_reason == f"stall control: {stall.stop_reason}"
+    assert stall.stop_reason.startswith("the best fitness improved less than")
+
+
+def test_incremental_diversity() -> None:
+    stall = ConvergenceStallControl(window=1000)
+    my_pop = Population(4, 30, sum, seed=2)
+    my_pop.log["print"] = False
+    my_pop.set_models(stall=stall)
+    for max_generations in (1, 20):
+        # the second run starts a new evolution
+        my_pop.evolve(max_generations, target=-1.0)
+        assert stall.last_generation == max_generations
+        assert stall.diversity == pytest.approx(variance(my_pop.pop), abs=1e-12)
+    assert "members" not in stall.get_state()
+
+
+def test_low_diversity() -> None:
+    stall = ConvergenceStallControl(window=2, min_improvement=-1.0, max_restarts=0)
+    pop = [Individual(2, list_of_genes=[0.5, 0.5]) for _ in range(5)]
+    for ind in pop:
+        ind.set_fit_value(1.0)
+    assert stall.stall_pop(1, 10, pop) == 1
+    assert stall.stall_pop(2, 10, pop) == 2
+    assert stall.stall_pop(3, 10, pop) == 10
+    assert stall.diversity == 0.0
+    assert stall.stop_reason.startswith("the diversity")
+
+
+def test_restart_keeps_the_best() -> None:
+    stall = ConvergenceStallControl(window=1, ind_ratio=0.5)
+    pop = [Individual(2, list_of_genes=[0.5, 0.5]) for _ in range(4)]
+    for ind in pop:
+        ind.set_fit_value(1.0)
+    stall.stall_pop(1, 10, pop)
+    stall.stall_pop(2, 10, pop)
+    assert stall.restarts == 1
+    assert [ind.require_update() for ind in pop] == [False, False, True, True]
+
+
+def test_stop_reason() -> None:
+    my_pop = Population(2, 10, sum)
+    my_pop.log["print"] = False
+    my_pop.set_models(stall=GenerationStallControl())
+    my_pop.evolve(3, target=-1.0)
+    assert my_pop.stop_reason == "max generations reached"
+    my_pop.evolve(3, target=10.0)
+    assert my_pop.stop_reason == "target reached"
+
+
+def test_randomizes_the_worst_of_an_unsorted_population() -> None:
+    stall = GenerationStallControl(num_of_generations=1, ind_ratio=0.5)
+    pop = [Individual(2, list_of_genes=[0.5, 0.5]) for _ in range(6)]
+    for ind, fit in zip(pop, [0.0, 5.0, 1.0, 4.0, 2.0, 3.0]):
+        ind.set_fit_value(fit)
+    stall.stall_pop(1, 10, pop)
+    assert [ind.require_update() for ind in pop] == [False, True, False, True, False, False]
+
+
+def test_randomizes_the_worst_rows_of_an_unsorted_population() -> None:
+    np = pytest.importorskip("numpy")
+    from genetic_algorithm.matrix import PopulationMatrix
+    stall = GenerationStallControl(num_of_generations=1, ind_ratio=0.5)
+    pop = PopulationMatrix(np.full((6, 2), 0.5))
+    pop.set_fit_values(np.arange(6), np.array([0.0, 5.0, 1.0, 4.0, 2.0, 3.0]))
+    stall.stall_matrix(1, 10, pop)
+    assert pop.require_update.tolist() == [False, True, False, True, False, False]
+
+
+@pytest.mark.parametrize("engine", ["individual", "matrix"])
+def test_keeps_the_order_of_the_population_selector(engine: str) -> None:
+    if engine == "matrix":
+        pytest.importorskip("numpy")
+    my_pop = Population(4, 30, sum, engine=engine, seed=3)
+    my_pop.log["print"] = False
+    my_pop.set_models(pop_selector=PartialBestIndividualSelector(sort_elite=False),
+                      stall=GenerationStallControl(num_of_generations=2))
+    cur_gen = my_pop.start_evolution()
+    for cur_gen in range(cur_gen + 1, cur_gen + 5):
+        my_pop.evolve_generation(cur_gen, 10)
+        fit_values = [ind.fit() for ind in my_pop.pop]
+        assert fit_values[0] == min(fit_values)
+        if cur_gen % 2 == 0:
+            # the randomized individuals are evaluated without sorting the whole population
+            assert fit_values != sorted(fit_values)
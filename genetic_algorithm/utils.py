@@ -1,14 +1,95 @@
-import random
+from array import array
+import math
+import sys
 from .individual import Individual
-from typing import List
+from .rng import DEFAULT_STREAM, RandomStream
+from typing import Any, Dict, Iterable, List, Tuple
 
+try:
+    import numpy as np
+except ImportError:  # numpy is only required by the matrix engine
+    np = None
 
-def generate_random_int(low: int, upper: int) -> int:
-    return random.randint(low, upper)
 
+def get_random_state() -> Dict[str, Any]:
+    """Return the state of the random module and of the numpy generator (rng.DEFAULT_STREAM), see set_random_state."""
+    return DEFAULT_STREAM.get_state()
 
-def generate_random_number() -> float:
-    return random.uniform(0.0, 1.0)
+
+def set_random_state(state: Dict[str, Any]) -> None:
+    DEFAULT_STREAM.set_state(state)
+
+
+def pack_doubles(values: Iterable[float], byteorder: str = "big") -> bytes:
+    """Pack the values as doubles in the byteorder ("big", the network byte order, or "little")."""
+    values = array("d", values)
+    if sys.byteorder != byteorder:
+        values.byteswap()
+    return values.tobytes()
+
+
+def unpack_doubles(data: bytes, byteorder: str = "big") -> List[float]:
+    values = array("d")
+    values.frombytes(data)
+    if sys.byteorder != byteorder:
+        values.byteswap()
+    return values.tolist()
+
+
+# the random helpers draw from rng (see rng.RandomStream), by default the stream shared by the whole process
+def generate_random_int(low: int, upper: int, rng: RandomStream = None) -> int:
+    return (rng or DEFAULT_STREAM).randint(low, upper)
+
+
+def generate_random_number(rng: RandomStream = None) -> float:
+    return (rng or DEFAULT_STREAM).number()
+
+
+def generate_random_matrix(shape: Tuple[int, ...], rng: RandomStream = None) -> "np.ndarray":
+    return (rng or DEFAULT_STREAM).matrix(shape)
+
+
+def generate_random_permutations(n_permutations: int, size: int, rng: RandomStream = None) -> "np.ndarray":
+    """Return a (n_permutations x size) array where each row is an independent permutation of range(size)."""
+    return (rng or DEFAULT_STREAM).permutations(n_permutations, size)
+
+
+def sample_sparse_indexes(size: int, chance: float, rng: RandomStream = None) -> List[int]:
+    """Return the sorted indexes of range(size), each selected with probability chance. The gaps between the
+    selected indexes follow a geometric distribution, so the expected cost is proportional to the number of
+    selected indexes instead of size.
+    """
+    rng = rng or DEFAULT_STREAM
+    if chance <= 0.0:
+        return []
+    if chance >= 1.0:
+        return list(range(size))
+    log_q = math.log(1.0 - chance)
+    indexes = []
+    i = -1
+    while True:
+        i += 1 + int(math.log(1.0 - rng.number()) / log_q)
+        if i >= size:
+            return indexes
+        indexes.append(i)
+
+
+def sample_sparse_indexes_matrix(size: int, chance: float, rng: RandomStream = None) -> "np.ndarray":
+    """Array version of sample_sparse_indexes."""
+    rng = rng or DEFAULT_STREAM
+    if chance <= 0.0:
+        return np.empty(0, dtype=np.int64)
+    if chance >= 1.0:
+        return np.arange(size)
+    expected = size * chance
+    positions = np.empty(0, dtype=np.int64)
+    last = -1
+    while last < size:
+        gaps = rng.geometric(chance, int(expected + 5*math.sqrt(expected) + 10))
+        new_positions = last + np.cumsum(gaps)
+        positions = np.concatenate((positions, new_positions))
+        last = new_positions[-1]
+    return positions[positions < size]
 
 
 def k_tournament(k: int, n_individuals: int, pop: List[Individual]) -> List[int]:
@@ -37,4 +118,43 @@ def k_tournament(k: int, n_individuals: int, pop: List[Individual]) -> List[int]
         final_candidates = [x for _, x in sorted(zip(tournament_ind, tournament))]
         champions.append(final_candidates[0])
 
-    return champions
\ No newline at end of file
+    return champions
+
+
+def fast_k_tournament(k: int, n_individuals: int, fit_values: List[float], replacement: bool = False,
+                      rng: RandomStream = None) -> List[int]:
+    """Linear time k tournament over precomputed fitness values. Without replacement, the candidates of all
+    the tournaments are drawn at once from a shuffled pool, which is split in groups of k and reshuffled when
+    it is exhausted, so no individual competes twice before the whole pool is used. With replacement, each
+    tournament draws k independent candidates. It return a list with the index of the champions.
+    """
+    rng = rng or DEFAULT_STREAM
+    pop_size = len(fit_values)
+    k = min(k, pop_size)
+    if replacement:
+        candidates = rng.choices(range(pop_size), k=k*n_individuals)
+    else:
+        per_pool = pop_size // k
+        candidates = []
+        for _ in range(-(-n_individuals // per_pool)):
+            pool = list(range(pop_size))
+            rng.shuffle(pool)
+            candidates.extend(pool[:per_pool*k])
+    get_fit = fit_values.__getitem__
+    return [min(candidates[i:i + k], key=get_fit) for i in range(0, k*n_individuals, k)]
+
+
+def k_tournament_matrix(k: int, n_individuals: int, fit_values: "np.ndarray", replacement: bool = False,
+                        rng: RandomStream = None) -> "np.ndarray":
+    """Array version of fast_k_tournament for the matrix engine."""
+    rng = rng or DEFAULT_STREAM
+    pop_size = len(fit_values)
+    k = min(k, pop_size)
+    if replacement:
+        tournaments = rng.integers(0, pop_size, (n_individuals, k))
+    else:
+        per_pool = pop_size // k
+        n_pools = -(-n_individuals // per_pool)
+        tournaments = rng.permutations(n_pools, pop_size)[:, :per_pool*k].reshape(-1, k)[:n_individuals]
+    winners = np.argmin(fit_values[tournaments], axis=1)
+    return tournaments[np.arange(len(tournaments)), winners]